@@ -1,11 +1,20 @@
 import dash
 from dash import html
 import dash_bootstrap_components as dbc
+import flask
+import multiprocessing
 import plotly.io as pio
 
+from utils.cache_http import cache
+from utils.cliente_http import interruptor
+from utils.precarga import precarga_activada, precargador
+
 external_stylesheets = [dbc.themes.LUX, '/assets/css/style.css']
 pio.templates.default = "plotly_dark"
 
+# Dash importa cada página al arrancar para registrar su ruta, layout y callbacks;
+# los modelos (scipy, numba) se importan en su primer callback (utils/diferido.py,
+# CARGA_DIFERIDA=0 lo desactiva). Tiempo de arranque: benchmarks/presupuesto_arranque.py
 app = dash.Dash(
     __name__,
     use_pages=True,
@@ -14,6 +23,14 @@ app = dash.Dash(
 )
 server = app.server
 
+
+@server.route('/estado-servicios')
+def estado_servicios():
+    # Monitoreo: interruptores por host (estado y aperturas), caché HTTP y precarga
+    return flask.jsonify(interruptores=interruptor.estado(), cache=cache.estadisticas(),
+                         precarga=precargador.estado())
+
+
 ordered_names = ["Inicio", "Página 1", "Página 2", "Página 3"]
 pages = list(dash.page_registry.values())
 pages.sort(key=lambda p: ordered_names.index(p["name"]) if p["name"] in ordered_names else 99)
@@ -44,5 +61,11 @@ app.layout = html.Div([
     ], fluid=True, className="p-0")
 ])
 
+# Calienta en segundo plano los datos de las páginas COVID y Clima (PRECARGA=0 la desactiva).
+# Los trabajadores del pool de simulaciones (utils/estocastico.py) vuelven a
+# importar este módulo al arrancar: ellos no precargan
+if precarga_activada() and multiprocessing.current_process().name == "MainProcess":
+    precargador.iniciar()
+
 if __name__ == "__main__":
     app.run(debug=True)  
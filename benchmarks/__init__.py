@@ -0,0 +1,4 @@
+import os
+
+# Los benchmarks importan ``app``: sin precarga, para no consultar las APIs reales
+os.environ.setdefault('PRECARGA', '0')
@@ -0,0 +1,83 @@
+"""Caché HTTP de la página COVID contra un servidor local con retardo.
+
+Escenarios: primera carga (miss), recarga dentro del TTL (hit), TTL vencido
+con ETag (304), ventana stale-while-revalidate, servidor caído con copia
+guardada y varios procesos compartiendo la misma base SQLite.
+
+Uso: python -m benchmarks.bench_cache_http
+"""
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import app  # noqa: F401  (registra las páginas)
+from benchmarks.servidor_stub import ServidorStub
+from pages import pagina4
+from utils.cache_http import CacheHTTP
+
+RETARDO = 0.15
+
+
+def cronometrar(funcion, *args):
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return resultado, (time.perf_counter() - inicio) * 1e3
+
+
+def cargar(pais='Peru', dias=90):
+    return pagina4.obtener_datos_pais(pais), pagina4.obtener_historico_pais(pais, dias)
+
+
+def _en_otro_proceso(ruta, url):
+    pagina4.cache = CacheHTTP(ruta)
+    pagina4.API_COVID = url
+    datos, historico = cargar()
+    return datos is not None and historico is not None
+
+
+def main():
+    directorio = tempfile.mkdtemp()
+    ruta = os.path.join(directorio, 'http.sqlite3')
+    with ServidorStub(retardo=RETARDO) as stub:
+        pagina4.cache = CacheHTTP(ruta)
+        pagina4.API_COVID = stub.url
+        print(f"retardo del servidor: {RETARDO * 1e3:.0f} ms por petición\n")
+
+        _, ms = cronometrar(cargar)
+        print(f"{'primera carga (miss)':<34}{ms:8.1f} ms   peticiones={stub.total}")
+        _, ms = cronometrar(cargar)
+        print(f"{'recarga dentro del TTL (hit)':<34}{ms:8.1f} ms   peticiones={stub.total}")
+
+        pagina4.TTL_PAIS = pagina4.TTL_HISTORICO = 0
+        pagina4.SWR_PAIS = pagina4.SWR_HISTORICO = 0
+        _, ms = cronometrar(cargar)
+        print(f"{'TTL vencido, GET condicional':<34}{ms:8.1f} ms   peticiones={stub.total}"
+              f"  (304: {stub.respuestas_304})")
+
+        pagina4.SWR_PAIS = pagina4.SWR_HISTORICO = 3600
+        _, ms = cronometrar(cargar)
+        print(f"{'stale-while-revalidate':<34}{ms:8.1f} ms   (revalida en segundo plano)")
+        time.sleep(2 * RETARDO + 0.1)
+
+        pagina4.SWR_PAIS = pagina4.SWR_HISTORICO = 0
+        stub.caido = True
+        (datos, historico), ms = cronometrar(cargar)
+        stub.caido = False
+        print(f"{'servidor caído, copia guardada':<34}{ms:8.1f} ms   datos={'sí' if datos else 'no'}")
+
+        pagina4.TTL_PAIS, pagina4.TTL_HISTORICO = 600, 6 * 3600
+        _, ms = cronometrar(cargar)
+        antes = stub.total
+        with ProcessPoolExecutor(4) as procesos:
+            inicio = time.perf_counter()
+            ok = list(procesos.map(_en_otro_proceso, [ruta] * 8, [stub.url] * 8))
+            ms = (time.perf_counter() - inicio) * 1e3
+        print(f"{'8 cargas en 4 procesos':<34}{ms:8.1f} ms   peticiones nuevas={stub.total - antes}"
+              f"  correctas={sum(ok)}/8")
+
+    print("\ncontadores:", CacheHTTP(ruta).estadisticas())
+
+
+if __name__ == '__main__':
+    main()
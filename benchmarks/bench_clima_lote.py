@@ -0,0 +1,53 @@
+"""Refrescar las cinco ciudades del clima: una petición por ciudad vs. una en lote.
+
+Antes: ``fetch_weather`` por ciudad y un DataFrame por ciudad para graficar.
+Después: ``fetch_weather_batch`` con coordenadas separadas por comas y una
+matriz ``(ciudades, horas)`` para la gráfica comparativa.
+
+Uso: python -m benchmarks.bench_clima_lote
+"""
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+import app  # noqa: F401  (registra las páginas)
+from benchmarks.servidor_stub import ServidorStub
+from pages import paises
+from utils.cache_http import CacheHTTP
+
+RETARDO = 0.1
+DIAS = 7
+
+
+def antes():
+    tablas = []
+    for opt in paises.CITY_OPTIONS.values():
+        data = paises.fetch_weather(opt['lat'], opt['lon'], DIAS)
+        df = pd.DataFrame({'time': data['hourly']['time'], 'temperature': data['hourly']['temperature_2m']})
+        df['time'] = pd.to_datetime(df['time'])
+        tablas.append(df)
+    return tablas
+
+
+def despues():
+    return paises.stack_hourly(paises.fetch_weather_batch(list(paises.CITY_OPTIONS), DIAS), 'temperature_2m')
+
+
+def main():
+    paises.cache = CacheHTTP(os.path.join(tempfile.mkdtemp(), 'http.sqlite3'))
+    with ServidorStub(retardo=RETARDO) as stub:
+        paises.FORECAST_URL = stub.url + '/v1/forecast'
+        print(f"{len(paises.CITY_OPTIONS)} ciudades, {DIAS} días, retardo {RETARDO * 1e3:.0f} ms\n")
+        for nombre, funcion in (('por ciudad', antes), ('en lote', despues)):
+            paises.cache.limpiar()
+            previas = stub.total
+            inicio = time.perf_counter()
+            funcion()
+            ms = (time.perf_counter() - inicio) * 1e3
+            print(f"{nombre:<12} {ms:8.1f} ms   peticiones={stub.total - previas}")
+
+
+if __name__ == '__main__':
+    main()
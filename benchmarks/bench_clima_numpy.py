@@ -0,0 +1,109 @@
+"""Clima: ingesta horaria del callback con pandas frente a NumPy.
+
+Antes: ``pd.DataFrame`` + ``pd.to_datetime`` + ``Series.sum()/.mean()`` en cada
+llamada. Después: ``hourly_arrays`` (datetime64 y floats) y reducciones
+``np.nansum``/``np.nanmean``. Se mide la ingesta sola y el callback completo
+(incluida la figura), con latencia mediana y pico de memoria (tracemalloc), y
+el coste de importar pandas que ya no paga el arranque.
+
+Uso: python -m benchmarks.bench_clima_numpy
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import plotly.graph_objects as go
+
+import app  # noqa: F401  (registra las páginas)
+from benchmarks.servidor_stub import ServidorStub
+from pages import paises
+from utils.cache_http import CacheHTTP
+from utils.pronosticos import CachePronosticos
+
+REPETICIONES = 200
+
+
+def ingesta_pandas(data):
+    import pandas as pd
+
+    hourly = data.get('hourly', {})
+    try:
+        df = pd.DataFrame({'time': hourly.get('time', []), 'temperature': hourly.get('temperature_2m', []),
+                           'precipitation': hourly.get('precipitation', []),
+                           'humidity': hourly.get('relativehumidity_2m', [])})
+        df['time'] = pd.to_datetime(df['time'])
+    except Exception:
+        df = pd.DataFrame()
+    total = float(df['precipitation'].sum()) if not df.empty else None
+    media = float(df['humidity'].mean()) if not df.empty else None
+    return df, total, media
+
+
+def ingesta_numpy(data):
+    hourly = paises.hourly_arrays(data)
+    if hourly is None:
+        return None, None, None
+    return hourly, float(np.nansum(hourly['precipitation'])), float(np.nanmean(hourly['relativehumidity_2m']))
+
+
+def callback_pandas(data):
+    df, total, media = ingesta_pandas(data)
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=df['time'], y=df['temperature'], mode='lines'))
+    return total, media, fig
+
+
+def callback_numpy(data):
+    hourly, total, media = ingesta_numpy(data)
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=hourly['time'], y=hourly['temperature_2m'], mode='lines'))
+    return total, media, fig
+
+
+def medir(funcion, data):
+    funcion(data)  # calentamiento
+    tiempos = []
+    for _ in range(REPETICIONES):
+        inicio = time.perf_counter()
+        funcion(data)
+        tiempos.append((time.perf_counter() - inicio) * 1e3)
+    tracemalloc.start()
+    funcion(data)
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return statistics.median(tiempos), pico / 1024
+
+
+def importar_pandas():
+    codigo = 'import time; t = time.perf_counter(); import pandas; print((time.perf_counter() - t) * 1e3)'
+    return float(subprocess.run([sys.executable, '-c', codigo], capture_output=True, text=True).stdout)
+
+
+def main():
+    print(f"pandas cargado tras importar la app: {'pandas' in sys.modules}")
+    print(f"importar pandas (proceso nuevo): {importar_pandas():.0f} ms\n")
+    with ServidorStub() as stub:
+        paises.FORECAST_URL = stub.url + '/v1/forecast'
+        paises.cache = CacheHTTP(os.path.join(tempfile.mkdtemp(), 'http.sqlite3'))
+        paises.forecasts = CachePronosticos(paises._fetch_city, horizonte_max=paises.MAX_FORECAST_DAYS,
+                                            edad=paises._city_age)
+        data = paises.forecasts.obtener('Lima,PE', paises.MAX_FORECAST_DAYS)
+
+    antes, despues = ingesta_pandas(data), ingesta_numpy(data)
+    assert np.isclose(antes[1], despues[1]) and np.isclose(antes[2], despues[2])
+    print(f"{len(data['hourly']['time'])} horas, mismos totales: precipitación={despues[1]:.1f} mm, "
+          f"humedad={despues[2]:.0f} %\n")
+    print(f"{'':<22}{'mediana':>10}{'pico memoria':>16}")
+    for nombre, funcion in (('ingesta pandas', ingesta_pandas), ('ingesta numpy', ingesta_numpy),
+                            ('callback pandas', callback_pandas), ('callback numpy', callback_numpy)):
+        ms, kib = medir(funcion, data)
+        print(f"{nombre:<22}{ms:8.3f} ms{kib:12.1f} KiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Vista de comparación de países: N peticiones secuenciales vs. una masiva.
+
+Antes: un ``obtener_historico_pais`` por país, uno tras otro. Después:
+``comparar_paises`` pide ``/historical/a,b,c`` y ``/countries/a,b,c`` a la
+vez y calcula diarios, media móvil y tasa por habitante sobre una matriz.
+
+Uso: python -m benchmarks.bench_comparacion
+"""
+import os
+import tempfile
+import time
+
+import app  # noqa: F401  (registra las páginas)
+from benchmarks.servidor_stub import ServidorStub
+from pages import pagina4
+from utils.cache_http import CacheHTTP
+from utils.historico import AlmacenHistorico
+
+RETARDO = 0.1
+PAISES = [o['value'] for o in pagina4.OPCIONES_PAISES]
+
+
+def reiniciar():
+    # Misma base vaciada: descartar conexiones SQLite en WAL fuerza un checkpoint con fsync
+    pagina4.cache.limpiar()
+    pagina4.historicos = AlmacenHistorico(pagina4.obtener_historico_pais, refresco=pagina4.TTL_HISTORICO,
+                                          descargar_varios=pagina4.obtener_historico_paises)
+
+
+def main():
+    pagina4.cache = CacheHTTP(os.path.join(tempfile.mkdtemp(), 'http.sqlite3'))
+    with ServidorStub(retardo=RETARDO) as stub:
+        pagina4.API_COVID = stub.url
+        print(f"retardo del servidor: {RETARDO * 1e3:.0f} ms\n")
+        print(f"{'países':>7} {'antes (ms)':>12} {'después (ms)':>14} {'peticiones':>11}")
+        for n in range(1, len(PAISES) + 1):
+            reiniciar()
+            inicio = time.perf_counter()
+            for pais in PAISES[:n]:
+                pagina4.obtener_historico_pais(pais, 'all')
+            ms_antes = (time.perf_counter() - inicio) * 1e3
+
+            reiniciar()
+            antes = stub.total
+            inicio = time.perf_counter()
+            pagina4.comparar_paises(PAISES[:n], 'media7', ['si'], 'all')
+            ms_despues = (time.perf_counter() - inicio) * 1e3
+            print(f"{n:>7} {ms_antes:12.1f} {ms_despues:14.1f} {stub.total - antes:>7} vs {n}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""Compara el RHS escrito a mano (listas de Python) con el RHS generado.
+
+Uso: python -m benchmarks.bench_compartimentos
+"""
+import timeit
+
+import numpy as np
+from scipy.integrate import odeint
+
+from utils.compartimentos import SIR, SEIR, SEIRS, SEIRD
+
+
+def sir_lista(y, t, beta, gamma, N):
+    S, I, R = y
+    return [-beta * S * I / N, beta * S * I / N - gamma * I, gamma * I]
+
+
+def seir_lista(y, t, beta, sigma, gamma, N):
+    S, E, I, R = y
+    return [-beta * S * I / N, beta * S * I / N - sigma * E, sigma * E - gamma * I, gamma * I]
+
+
+PARAMS = {'beta': 0.5, 'sigma': 1 / 5.2, 'gamma': 0.1, 'omega': 0.01, 'mu': 0.005, 'N': 10000.0}
+INICIALES = {'I': 1.0}
+
+
+def tiempo(funcion, repeticiones=50):
+    return min(timeit.repeat(funcion, number=repeticiones, repeat=3)) / repeticiones * 1e3
+
+
+def main():
+    t = np.linspace(0, 365, 400)
+    manuales = {'SIR': sir_lista, 'SEIR': seir_lista}
+    print(f"{'modelo':>7} {'lista (ms)':>11} {'generado (ms)':>14} {'error max':>10}")
+    for modelo in (SIR, SEIR, SEIRS, SEIRD):
+        t_gen = tiempo(lambda: modelo.simular(PARAMS, t, INICIALES))
+        linea = f"{modelo.nombre:>7} "
+        if modelo.nombre in manuales:
+            y0 = modelo.estado_inicial(PARAMS['N'], INICIALES)
+            args = modelo.argumentos(PARAMS)
+            manual = manuales[modelo.nombre]
+            t_man = tiempo(lambda: odeint(manual, list(y0), t, args=args))
+            error = np.abs(odeint(manual, list(y0), t, args=args) - modelo.simular(PARAMS, t, INICIALES)).max()
+            linea += f"{t_man:>11.3f} {t_gen:>14.3f} {error:>10.2e}"
+        else:
+            linea += f"{'-':>11} {t_gen:>14.3f} {'-':>10}"
+        print(linea)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Latencia de ``actualizar_dashboard_covid`` contra un servidor local con retardo.
+
+Antes: ``requests.get`` sin sesión para el país y luego para el histórico
+(conexión nueva cada vez, latencia = suma). Después: ambas peticiones a la vez
+sobre la sesión compartida (latencia ≈ la mayor). La caché se vacía antes de
+cada repetición para medir siempre el camino de red; "solo red" excluye la
+construcción de la figura.
+
+Uso: python -m benchmarks.bench_covid_paralelo
+"""
+import os
+import statistics
+import tempfile
+import time
+
+import requests
+
+import app  # noqa: F401  (registra las páginas)
+from benchmarks.servidor_stub import ServidorStub
+from pages import pagina4
+from utils.cache_http import CacheHTTP
+from utils.cliente_http import en_paralelo
+
+REPETICIONES = 10
+
+
+def antes(pais, dias):
+    # Camino anterior: dos GET secuenciales, cada uno con conexión propia
+    datos = requests.get(f"{pagina4.API_COVID}/countries/{pais}", timeout=10).json()
+    historico = requests.get(f"{pagina4.API_COVID}/historical/{pais}",
+                             params={'lastdays': dias}, timeout=10).json()
+    return datos, historico
+
+
+def despues(pais, dias):
+    pagina4.cache.limpiar()
+    return pagina4.actualizar_dashboard_covid(1, pais, dias)
+
+
+def solo_red(pais, dias):
+    pagina4.cache.limpiar()
+    return en_paralelo((pagina4.obtener_datos_pais, pais), (pagina4.obtener_historico_pais, pais, dias))
+
+
+def medir(funcion):
+    tiempos = []
+    for _ in range(REPETICIONES):
+        inicio = time.perf_counter()
+        funcion('Peru', 90)
+        tiempos.append((time.perf_counter() - inicio) * 1e3)
+    return statistics.median(tiempos)
+
+
+def main():
+    pagina4.cache = CacheHTTP(os.path.join(tempfile.mkdtemp(), 'http.sqlite3'))
+    print(f"{'retardo':>8} {'antes (ms)':>12} {'después (ms)':>14} {'solo red (ms)':>15}")
+    for retardo in (0.05, 0.1, 0.2):
+        with ServidorStub(retardo=retardo) as stub:
+            pagina4.API_COVID = stub.url
+            despues('Peru', 90)  # calentamiento: abre las conexiones del pool
+            print(f"{retardo * 1e3:6.0f}ms {medir(antes):12.1f} {medir(despues):14.1f} {medir(solo_red):15.1f}")
+
+
+if __name__ == '__main__':
+    main()
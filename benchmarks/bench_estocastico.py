@@ -0,0 +1,42 @@
+"""Escalamiento del simulador estocástico con el número de procesos.
+
+Uso: python -m benchmarks.bench_estocastico [replicas] [metodo]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+from utils.compartimentos import SEIR
+from utils.estocastico import simular_replicas
+
+PARAMS = {'beta': 0.5, 'sigma': 1 / 5.2, 'gamma': 0.1, 'N': 10000.0}
+
+
+def main(replicas=10000, metodo='tau'):
+    t = np.linspace(0, 160, 161)
+    nucleos = os.cpu_count() or 1
+    print(f"{replicas} réplicas SEIR ({metodo}), {nucleos} núcleos disponibles")
+    print(f"{'procesos':>9} {'tiempo (s)':>11} {'aceleración':>12}")
+
+    referencia = None
+    base = None
+    procesos = 1
+    while procesos <= nucleos:
+        inicio = time.perf_counter()
+        resultado = simular_replicas(SEIR, PARAMS, t, {'I': 1.0}, replicas=replicas,
+                                     metodo=metodo, semilla=42, procesos=procesos)
+        duracion = time.perf_counter() - inicio
+        base = base or duracion
+        if referencia is None:
+            referencia = resultado
+        elif not np.array_equal(referencia, resultado):
+            print("  ¡Los resultados cambian con el número de procesos!")
+        print(f"{procesos:>9} {duracion:>11.2f} {base / duracion:>11.2f}x")
+        procesos *= 2
+
+
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    main(int(argumentos[0]) if argumentos else 10000, argumentos[1] if len(argumentos) > 1 else 'tau')
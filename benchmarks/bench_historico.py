@@ -0,0 +1,61 @@
+"""Cambiar el rango de días en la página COVID: nueva petición vs. vista local.
+
+Antes: cada opción de ``dropdown-dias-covid`` pedía ``lastdays=n`` a la API y
+convertía las fechas con ``strptime`` una por una. Después: el histórico
+completo se descarga una vez y cada rango es una vista de los mismos arreglos.
+
+Uso: python -m benchmarks.bench_historico
+"""
+import time
+from datetime import datetime
+
+import numpy as np
+import requests
+
+from benchmarks.servidor_stub import ServidorStub, _historico
+from utils.historico import AlmacenHistorico, parsear_fechas
+
+RANGOS = (30, 60, 90, 120, 'all')
+RETARDO = 0.1
+
+
+def antes(url, pais, dias):
+    datos = requests.get(f"{url}/historical/{pais}", params={'lastdays': dias}, timeout=10).json()
+    casos = datos['timeline']['cases']
+    return [datetime.strptime(f, '%m/%d/%y') for f in casos], list(casos.values())
+
+
+def main():
+    claves = list(_historico('Peru', 'all')['timeline']['cases'])
+    repeticiones = 200
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        [datetime.strptime(f, '%m/%d/%y') for f in claves]
+    ms_strptime = (time.perf_counter() - inicio) / repeticiones * 1e3
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        parsear_fechas(claves)
+    ms_vector = (time.perf_counter() - inicio) / repeticiones * 1e3
+    print(f"parseo de {len(claves)} fechas: strptime {ms_strptime:.2f} ms, vectorizado {ms_vector:.3f} ms\n")
+
+    with ServidorStub(retardo=RETARDO) as stub:
+        def descargar(pais, dias):
+            return requests.get(f"{stub.url}/historical/{pais}", params={'lastdays': dias}, timeout=10).json()
+
+        almacen = AlmacenHistorico(descargar)
+        print(f"{'rango':>6} {'antes (ms)':>12} {'después (ms)':>14} {'vista':>7}")
+        for dias in RANGOS:
+            inicio = time.perf_counter()
+            antes(stub.url, 'Peru', dias)
+            ms_antes = (time.perf_counter() - inicio) * 1e3
+            inicio = time.perf_counter()
+            fechas, columnas = almacen.ultimos('Peru', dias)
+            ms_despues = (time.perf_counter() - inicio) * 1e3
+            vista = np.shares_memory(columnas['cases'], almacen.serie('Peru').columnas['cases'])
+            print(f"{str(dias):>6} {ms_antes:12.1f} {ms_despues:14.3f} {'sí' if vista else 'no':>7}")
+        print(f"\npeticiones al servidor: {stub.total} ({len(RANGOS)} antes, "
+              f"{stub.total - len(RANGOS)} después)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Compara odeint con el integrador Dormand–Prince (compilado y NumPy puro).
+
+Termina con código 1 si la salida de rk45 en ``t_eval`` se aleja de la
+referencia más que ``COTA_ERROR`` personas: 10 veces la tolerancia relativa
+por defecto (1e-6) sobre la población.
+
+Uso: python -m benchmarks.bench_integradores
+"""
+import sys
+import timeit
+
+import numpy as np
+from scipy.integrate import odeint
+
+from utils.compartimentos import SIR, SEIR
+from utils.integradores import NUMBA_DISPONIBLE, dopri5
+
+PARAMS = {'beta': 0.5, 'sigma': 1 / 5.2, 'gamma': 0.1, 'N': 10000.0}
+COTA_ERROR = 10 * 1e-6 * PARAMS['N']
+
+
+def seir_lista(y, t, beta, sigma, gamma, N):
+    # Versión original de pages/pagina_seir.py, como referencia
+    S, E, I, R = y
+    return [-beta * S * I / N, beta * S * I / N - sigma * E, sigma * E - gamma * I, gamma * I]
+
+
+def tiempo_ms(funcion, repeticiones=20):
+    return min(timeit.repeat(funcion, number=repeticiones, repeat=3)) / repeticiones * 1e3
+
+
+def main():
+    print(f"Numba disponible: {NUMBA_DISPONIBLE}")
+    y0 = SEIR.estado_inicial(PARAMS['N'], {'I': 1.0})
+    args = SEIR.argumentos(PARAMS)
+    SEIR.simular(PARAMS, np.linspace(0, 1, 2), {'I': 1.0}, metodo='rk45')  # compilar fuera de la medición
+
+    errores = []
+    print(f"{'horizonte':>9} {'odeint (ms)':>12} {'rk45 (ms)':>10} {'rk45 numpy (ms)':>16} {'error max':>10}")
+    for horizonte in (50, 160, 365, 1000):
+        t = np.linspace(0, horizonte, 400)
+        referencia = odeint(seir_lista, y0, t, args=args, rtol=1e-10, atol=1e-10)
+        t_ode = tiempo_ms(lambda: odeint(seir_lista, list(y0), t, args=args))
+        t_rk = tiempo_ms(lambda: SEIR.simular(PARAMS, t, {'I': 1.0}, metodo='rk45'))
+        t_np = tiempo_ms(lambda: dopri5(SEIR.rhs, y0, t, args, compilado=False), repeticiones=3)
+        error = np.abs(SEIR.simular(PARAMS, t, {'I': 1.0}, metodo='rk45') - referencia).max()
+        errores.append(error)
+        print(f"{horizonte:>9} {t_ode:>12.3f} {t_rk:>10.3f} {t_np:>16.3f} {error:>10.2e}")
+
+    t = np.linspace(0, 160, 200)
+    error_sir = np.abs(SIR.simular(PARAMS, t, {'I': 1.0}, metodo='rk45')
+                       - SIR.simular(PARAMS, t, {'I': 1.0}, metodo='odeint')).max()
+    errores.append(error_sir)
+    print(f"SIR rk45 vs odeint, error max: {error_sir:.2e}")
+
+    if max(errores) > COTA_ERROR:
+        print(f"FALLA: error max {max(errores):.2e} supera la cota de {COTA_ERROR:.2e} personas")
+        sys.exit(1)
+    print(f"OK: error max {max(errores):.2e} dentro de la cota de {COTA_ERROR:.2e} personas")
+
+
+if __name__ == "__main__":
+    main()
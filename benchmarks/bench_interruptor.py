@@ -0,0 +1,60 @@
+"""Latencia de la página COVID con disease.sh caído, con y sin interruptor.
+
+El servidor local deja de responder a tiempo (retardo mayor que el timeout).
+Se llama a ``actualizar_dashboard_covid`` repetidamente para un país sin
+copia en caché y para otro con copia vencida: los primeros intentos esperan
+el timeout, luego el interruptor se abre y la respuesta (error o copia
+guardada) llega en milisegundos. Al recuperarse el servidor, la petición de
+prueba del estado semiabierto lo vuelve a cerrar.
+
+Uso: python -m benchmarks.bench_interruptor
+"""
+import os
+import tempfile
+import time
+from urllib.parse import urlparse
+
+import app  # noqa: F401  (registra las páginas)
+from benchmarks.servidor_stub import ServidorStub
+from pages import pagina4
+from utils.cache_http import CacheHTTP
+from utils.cliente_http import InterruptorCircuito
+
+TIMEOUT = 1.0
+ESPERA = 2.0
+
+
+def llamada(pais, interruptor, host):
+    inicio = time.perf_counter()
+    salida = pagina4.actualizar_dashboard_covid(1, pais, 30)
+    ms = (time.perf_counter() - inicio) * 1e3
+    estado = interruptor.estado().get(host, {'estado': '-', 'aperturas': 0})
+    print(f"{pais:<10} {ms:9.1f} ms  casos={salida[0]:<11} estado={estado['estado']:<11} "
+          f"aperturas={estado['aperturas']}  {salida[5]}")
+
+
+def main():
+    interruptor = InterruptorCircuito(umbral=3, espera=ESPERA)
+    pagina4.cache = CacheHTTP(os.path.join(tempfile.mkdtemp(), 'http.sqlite3'), interruptor=interruptor)
+    pagina4.TIMEOUT = TIMEOUT
+    with ServidorStub() as stub:
+        pagina4.API_COVID = stub.url
+        host = urlparse(stub.url).netloc
+        pagina4.actualizar_dashboard_covid(1, 'Peru', 30)  # Peru queda en caché
+        pagina4.TTL_PAIS = pagina4.SWR_PAIS = 0           # ...pero vencida
+        pagina4.historicos.refresco = 0
+
+        print(f"servidor caído (timeout {TIMEOUT:.0f} s, umbral 3 fallos, espera {ESPERA:.0f} s)\n")
+        stub.retardo = 2 * TIMEOUT
+        for pais in ['Colombia'] * 3 + ['Colombia', 'Peru', 'Colombia', 'Peru']:
+            llamada(pais, interruptor, host)
+
+        print("\nservidor recuperado, pasado el tiempo de espera\n")
+        stub.retardo = 0
+        time.sleep(ESPERA)
+        for pais in ['Colombia', 'Peru']:
+            llamada(pais, interruptor, host)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Tamaño de la respuesta al arrastrar un slider en la página logística.
+
+Antes: dos callbacks (figura completa + etiquetas) por cada tick.
+Después: un callback con un Patch que solo lleva los arreglos modificados.
+
+Uso: python -m benchmarks.bench_logistica
+"""
+import json
+from unittest import mock
+
+import plotly.graph_objects as go
+import plotly.io as pio
+from dash import Patch
+
+import app  # noqa: F401  (registra las páginas)
+from pages import Tarea
+
+
+def tamano(*salidas):
+    cuerpo = [s.to_plotly_json() if isinstance(s, Patch) else s for s in salidas]
+    return len(pio.json.to_json_plotly(cuerpo).encode())
+
+
+def figura_antigua(x, y):
+    # Figura que devolvía plot_logistic antes del cambio, en cada tick
+    fig = go.Figure()
+    fig.add_scatter(x=x, y=y, mode="lines", name="P(t)")
+    fig.update_layout(
+        title={'text': 'Modelo logístico de crecimiento poblacional', 'x': 0.07},
+        xaxis_title="Tiempo(t)", yaxis_title="Población P(t)",
+        height=520, margin=dict(l=50, r=30, t=50, b=50)
+    )
+    return fig
+
+
+def respuesta_nueva(disparador, p0=820, r=0.12, k=3000, t=42):
+    with mock.patch.object(Tarea, 'ctx', mock.Mock(triggered_id=disparador)):
+        return Tarea.plot_logistic(None, p0, r, k, t)
+
+
+def main():
+    x, y = Tarea.curva_logistica(820, 0.12, 3000, 42)
+    antes = tamano(figura_antigua(x, y)) + len(json.dumps(["820", "0.12", "3000", "42"]).encode())
+    print(f"{'evento':>22} {'bytes':>8} {'peticiones':>11}")
+    print(f"{'antes (cualquier slider)':>22} {antes:>8} {2:>11}")
+    for disparador in (None, 'slider-r', 'slider-t'):
+        nombre = disparador or 'primer render'
+        print(f"{nombre:>22} {tamano(*respuesta_nueva(disparador)):>8} {1:>11}")
+
+
+if __name__ == "__main__":
+    main()
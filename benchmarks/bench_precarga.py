@@ -0,0 +1,74 @@
+"""Primer usuario tras reiniciar: callbacks en frío vs. tras una ronda de precarga.
+
+Se llaman ``actualizar_dashboard_covid`` para cada país y ``actualizar_clima``
+para cada ciudad contra un servidor local con retardo, primero con la caché
+vacía y después de ``precargador.ronda()``. También se comprueba que la ronda
+no supera la concurrencia configurada.
+
+Uso: python -m benchmarks.bench_precarga
+"""
+import os
+import tempfile
+import time
+
+import app  # noqa: F401  (registra las páginas)
+from benchmarks.servidor_stub import ServidorStub
+from pages import pagina4, paises
+from utils.cache_http import CacheHTTP
+from utils.historico import AlmacenHistorico
+from utils.precarga import precargador
+
+RETARDO = 0.2
+
+
+def reiniciar():
+    pagina4.cache.limpiar()
+    pagina4.historicos = AlmacenHistorico(pagina4.obtener_historico_pais, refresco=pagina4.TTL_HISTORICO,
+                                          descargar_varios=pagina4.obtener_historico_paises)
+    precargador.registrar('covid:historicos', pagina4.historicos.series,
+                          [o['value'] for o in pagina4.OPCIONES_PAISES])
+
+
+def recorrer():
+    """Latencia (ms) de cada callback y el último texto de ``info-actualizado-*``."""
+    tiempos, info = [], ''
+    for opcion in pagina4.OPCIONES_PAISES:
+        inicio = time.perf_counter()
+        info = pagina4.actualizar_dashboard_covid(1, opcion['value'], 30)[5]
+        tiempos.append((time.perf_counter() - inicio) * 1e3)
+    for ciudad in paises.CITY_OPTIONS:
+        inicio = time.perf_counter()
+        info_clima = paises.actualizar_clima(1, ciudad, 7)[5]
+        tiempos.append((time.perf_counter() - inicio) * 1e3)
+    return tiempos, info, info_clima
+
+
+def main():
+    cache = CacheHTTP(os.path.join(tempfile.mkdtemp(), 'http.sqlite3'))
+    pagina4.cache = paises.cache = cache
+    with ServidorStub(retardo=RETARDO) as stub:
+        pagina4.API_COVID = stub.url
+        paises.FORECAST_URL = stub.url + '/v1/forecast'
+        print(f"retardo del servidor: {RETARDO * 1e3:.0f} ms, concurrencia de la precarga: "
+              f"{precargador.concurrencia}\n")
+
+        reiniciar()
+        tiempos, info, info_clima = recorrer()
+        print(f"{'en frío':<22} media {sum(tiempos) / len(tiempos):7.1f} ms  máx {max(tiempos):7.1f} ms")
+
+        reiniciar()
+        stub.simultaneas_max = 0
+        inicio = time.perf_counter()
+        exitos = precargador.ronda()
+        ms_ronda = (time.perf_counter() - inicio) * 1e3
+        print(f"{'ronda de precarga':<22} {ms_ronda:7.1f} ms  tareas ok {exitos}/{len(precargador.estado())}"
+              f"  simultáneas máx {stub.simultaneas_max}")
+
+        time.sleep(1.5)
+        tiempos, info, info_clima = recorrer()
+        print(f"{'tras la precarga':<22} media {sum(tiempos) / len(tiempos):7.1f} ms  máx {max(tiempos):7.1f} ms")
+        print(f"\ninfo-actualizado-covid: {info}\ninfo-actualizado-clima: {info_clima}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Clima: recorrer todos los horizontes de todas las ciudades.
+
+Antes: una petición ``forecast_days=n`` por cada (ciudad, horizonte).
+Después: una descarga de 14 días por ciudad, recortada para cada horizonte y
+válida hasta la siguiente publicación de modelo.
+
+Uso: python -m benchmarks.bench_pronosticos
+"""
+import os
+import tempfile
+import time
+
+import app  # noqa: F401  (registra las páginas)
+from benchmarks.servidor_stub import ServidorStub
+from pages import paises
+from utils.cache_http import CacheHTTP
+from utils.pronosticos import CachePronosticos, proxima_actualizacion, ultima_actualizacion
+
+RETARDO = 0.1
+
+
+def recorrer(obtener):
+    inicio = time.perf_counter()
+    for ciudad in paises.CITY_OPTIONS:
+        for dias in paises.FORECAST_DAYS:
+            obtener(ciudad, dias)
+    return (time.perf_counter() - inicio) * 1e3
+
+
+def main():
+    formato = '%Y-%m-%d %H:%M UTC'
+    print(f"última publicación: {time.strftime(formato, time.gmtime(ultima_actualizacion()))}, "
+          f"próxima: {time.strftime(formato, time.gmtime(proxima_actualizacion()))}\n")
+    paises.cache = CacheHTTP(os.path.join(tempfile.mkdtemp(), 'http.sqlite3'))
+    with ServidorStub(retardo=RETARDO) as stub:
+        paises.FORECAST_URL = stub.url + '/v1/forecast'
+
+        def antes(ciudad, dias):
+            opt = paises.CITY_OPTIONS[ciudad]
+            return paises.fetch_weather(opt['lat'], opt['lon'], dias)
+
+        paises.forecasts = CachePronosticos(paises._fetch_city, horizonte_max=paises.MAX_FORECAST_DAYS,
+                                            edad=paises._city_age)
+        combinaciones = len(paises.CITY_OPTIONS) * len(paises.FORECAST_DAYS)
+        for nombre, obtener in (('por horizonte', antes), ('recorte de 14 días', paises.forecasts.obtener)):
+            paises.cache.limpiar()
+            previas = stub.total
+            ms = recorrer(obtener)
+            print(f"{nombre:<20} {ms:8.1f} ms   peticiones={stub.total - previas} ({combinaciones} consultas)")
+
+        previas = stub.total
+        ms = recorrer(paises.forecasts.obtener)
+        print(f"{'segunda pasada':<20} {ms:8.1f} ms   peticiones={stub.total - previas}")
+        print(f"\ntasa de aciertos: {paises.forecasts.tasa_aciertos():.0%}")
+        print("info-actualizado-clima:", paises.actualizar_clima(1, 'Lima,PE', 3)[5])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Compara el quiver antiguo (una traza por flecha) con el vectorizado.
+
+Uso: python -m benchmarks.bench_quiver [--sin-antiguo]
+"""
+import sys
+import time
+
+import numpy as np
+import plotly.graph_objects as go
+
+from utils.campo_vectorial import trazas_quiver
+
+
+def figura_antigua(X, Y, U, V):
+    n_filas, n_cols = X.shape
+    fig = go.Figure()
+    for i in range(n_filas):
+        for j in range(n_cols):
+            x0, y0 = X[i, j], Y[i, j]
+            fig.add_trace(go.Scatter(
+                x=[x0, x0 + U[i, j]], y=[y0, y0 + V[i, j]],
+                mode='lines+markers',
+                line=dict(color='blue', width=2),
+                marker=dict(size=[3, 5], color=['blue', 'red']),
+                showlegend=False,
+                hovertemplate=f"Punto: ({x0:.1f}, {y0:.1f})<br>Vector: ({U[i, j]:.2f}, {V[i, j]:.2f})"
+            ))
+    return fig
+
+
+def figura_nueva(X, Y, U, V):
+    return go.Figure(data=trazas_quiver(X, Y, U, V))
+
+
+def medir(constructor, X, Y, U, V):
+    inicio = time.perf_counter()
+    fig = constructor(X, Y, U, V)
+    t_build = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    payload = fig.to_json()
+    t_json = time.perf_counter() - inicio
+    return t_build, t_json, len(payload)
+
+
+def main(incluir_antiguo=True):
+    print(f"{'n':>5} {'metodo':>8} {'build (s)':>10} {'json (s)':>10} {'payload (KB)':>13}")
+    for n in (15, 50, 150):
+        x = np.linspace(-5, 5, n)
+        X, Y = np.meshgrid(x, x)
+        U, V = np.sin(X), np.cos(X)
+        metodos = [('nuevo', figura_nueva)]
+        if incluir_antiguo:
+            metodos.insert(0, ('antiguo', figura_antigua))
+        for nombre, constructor in metodos:
+            t_build, t_json, size = medir(constructor, X, Y, U, V)
+            print(f"{n:>5} {nombre:>8} {t_build:>10.4f} {t_json:>10.4f} {size / 1024:>13.1f}")
+
+
+if __name__ == "__main__":
+    main(incluir_antiguo='--sin-antiguo' not in sys.argv)
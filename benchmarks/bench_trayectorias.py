@@ -0,0 +1,32 @@
+"""Tiempo de cálculo y render de 2000 trayectorias x 500 pasos RK4.
+
+Uso: python -m benchmarks.bench_trayectorias
+"""
+import time
+
+import plotly.graph_objects as go
+
+from utils.expresiones import compilar
+from utils.trayectorias import semillas_malla, integrar_rk4, a_traza_unica
+
+
+def main(semillas=2000, pasos=500):
+    f_x, f_y = compilar('y'), compilar('-x - 0.1*y')
+    x0, y0 = semillas_malla(5, 5, semillas)
+
+    inicio = time.perf_counter()
+    tray_x, tray_y = integrar_rk4(f_x, f_y, x0, y0, 10.0 / pasos, pasos, (-5.5, 5.5, -5.5, 5.5),
+                                  guardar_cada=5)
+    t_rk4 = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    xs, ys = a_traza_unica(tray_x, tray_y)
+    payload = go.Figure(go.Scattergl(x=xs, y=ys, mode='lines')).to_json()
+    t_render = time.perf_counter() - inicio
+
+    print(f"{x0.size} trayectorias x {pasos} pasos")
+    print(f"RK4: {t_rk4:.3f} s | figura + json: {t_render:.3f} s | payload: {len(payload) / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
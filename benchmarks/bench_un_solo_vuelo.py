@@ -0,0 +1,81 @@
+"""Prueba de carga: 50 peticiones idénticas simultáneas con la caché vacía.
+
+Sin agrupación cada hilo descarga por su cuenta; con ``UnSoloVuelo`` en la
+caché HTTP un hilo descarga y los demás esperan su resultado, así que el
+servidor recibe una sola petición por URL. Termina con código 1 si en modo
+un solo vuelo el servidor recibe más de una petición o alguna respuesta falta.
+
+Uso: python -m benchmarks.bench_un_solo_vuelo
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
+
+import app  # noqa: F401  (registra las páginas)
+from benchmarks.servidor_stub import ServidorStub
+from pages import pagina4, paises
+from utils.cache_http import CacheHTTP
+
+RETARDO = 0.2
+CONCURRENTES = 50
+
+LLAMADAS = {
+    'obtener_datos_pais': lambda: pagina4.obtener_datos_pais('Peru'),
+    'obtener_historico_pais': lambda: pagina4.obtener_historico_pais('Peru', 'all'),
+    'fetch_weather': lambda: paises.fetch_weather(-12.0464, -77.0428, 7),
+}
+
+
+def carga(funcion):
+    """Lanza ``CONCURRENTES`` hilos a la vez; devuelve (ms, respuestas válidas)."""
+    barrera = threading.Barrier(CONCURRENTES)
+    resultados = []
+
+    def hilo():
+        barrera.wait()
+        resultados.append(funcion())
+
+    hilos = [threading.Thread(target=hilo) for _ in range(CONCURRENTES)]
+    inicio = time.perf_counter()
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    return (time.perf_counter() - inicio) * 1e3, sum(r is not None for r in resultados)
+
+
+def main():
+    fallos = []
+    cache = CacheHTTP(os.path.join(tempfile.mkdtemp(), 'http.sqlite3'))
+    pagina4.cache = paises.cache = cache
+    with ServidorStub(retardo=RETARDO) as stub:
+        pagina4.API_COVID = stub.url
+        paises.FORECAST_URL = stub.url + '/v1/forecast'
+        print(f"{CONCURRENTES} hilos, retardo {RETARDO * 1e3:.0f} ms\n")
+        print(f"{'función':<24} {'modo':<14} {'peticiones':>10} {'ms':>8} {'válidas':>8}")
+        for nombre, funcion in LLAMADAS.items():
+            for modo in ('sin agrupar', 'un solo vuelo'):
+                cache.limpiar()
+                antes = stub.total
+                if modo == 'sin agrupar':
+                    with mock.patch.object(cache._vuelos, 'ejecutar', lambda clave, f, *a: f(*a)), \
+                         mock.patch.object(cache, '_descargar_miss', lambda clave, *a: cache._descargar(clave, *a)):
+                        ms, validas = carga(funcion)
+                else:
+                    ms, validas = carga(funcion)
+                peticiones = stub.total - antes
+                print(f"{nombre:<24} {modo:<14} {peticiones:>10} {ms:8.1f} {validas:>5}/{CONCURRENTES}")
+                if modo == 'un solo vuelo' and (peticiones != 1 or validas != CONCURRENTES):
+                    fallos.append(nombre)
+    print("\ncontadores:", cache.estadisticas())
+    if fallos:
+        print(f"FALLA: sin agrupación en {', '.join(fallos)}")
+        sys.exit(1)
+    print("OK: una sola petición y todas las respuestas válidas por función")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Arranque en frío: informe de ``-X importtime`` y presupuesto de tiempo.
+
+Importa ``app`` en procesos nuevos con ``python -X importtime`` (mediana de
+``REPETICIONES``), con la carga diferida de las páginas y sin ella
+(``CARGA_DIFERIDA=0``), y muestra qué importaciones directas de la app pesan
+más. Termina con código 1 si el arranque con carga diferida supera el
+presupuesto: ``PRESUPUESTO_ARRANQUE_MS`` (por defecto 500 ms) o el primer
+argumento.
+
+Uso: python -m benchmarks.presupuesto_arranque [presupuesto_ms]
+"""
+import os
+import subprocess
+import sys
+
+REPETICIONES = 5
+PRINCIPALES = 12
+PRESUPUESTO_MS = float(os.environ.get('PRESUPUESTO_ARRANQUE_MS', 500))
+# Paquetes que las páginas solo necesitan dentro de sus callbacks
+PESADOS = ('scipy', 'numba', 'pandas')
+
+
+def importtime(carga_diferida):
+    """``{módulo: (propio_ms, acumulado_ms, profundidad)}`` de un ``import app`` en un proceso nuevo."""
+    entorno = dict(os.environ, PRECARGA='0', CARGA_DIFERIDA='1' if carga_diferida else '0')
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    salida = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=raiz,
+                            env=entorno, capture_output=True, text=True, check=True).stderr
+    modulos = {}
+    for linea in salida.splitlines():
+        if not linea.startswith('import time:') or 'self [us]' in linea:
+            continue
+        propio, acumulado, nombre = linea[len('import time:'):].split('|')
+        profundidad = (len(nombre) - len(nombre.lstrip())) // 2
+        modulos[nombre.strip()] = (int(propio) / 1e3, int(acumulado) / 1e3, profundidad)
+    return modulos
+
+
+def medir(carga_diferida):
+    corridas = [importtime(carga_diferida) for _ in range(REPETICIONES)]
+    mediana = sorted(corridas, key=lambda m: m['app'][1])[REPETICIONES // 2]
+    return mediana['app'][1], mediana
+
+
+def informe(modulos):
+    directos = sorted(((m, v) for m, v in modulos.items() if v[2] == 1), key=lambda x: -x[1][1])
+    for nombre, (_, acumulado, _) in directos[:PRINCIPALES]:
+        print(f"  {nombre:<36}{acumulado:8.1f} ms")
+    print(f"  {'app (páginas y layouts)':<36}{modulos['app'][0]:8.1f} ms")
+    cargados = [p for p in PESADOS if p in modulos]
+    print(f"  pesados importados al arrancar: {', '.join(cargados) or 'ninguno'}")
+
+
+def main():
+    presupuesto = float(sys.argv[1]) if len(sys.argv) > 1 else PRESUPUESTO_MS
+    total_ansioso, modulos_ansioso = medir(carga_diferida=False)
+    total, modulos = medir(carga_diferida=True)
+
+    print(f"CARGA_DIFERIDA=0: {total_ansioso:.0f} ms")
+    informe(modulos_ansioso)
+    print(f"\ncarga diferida: {total:.0f} ms")
+    informe(modulos)
+
+    print(f"\npresupuesto: {presupuesto:.0f} ms (mediana de {REPETICIONES} arranques)")
+    if total > presupuesto:
+        print(f"FALLA: el arranque supera el presupuesto en {total - presupuesto:.0f} ms")
+        sys.exit(1)
+    print(f"OK: margen de {presupuesto - total:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""Servidor HTTP local que imita las rutas de disease.sh y Open-Meteo usadas por la app.
+
+Responde ``/countries/{pais}`` y ``/historical/{pais}?lastdays=n`` (también
+con varios países separados por comas) y ``/v1/forecast`` de Open-Meteo con
+datos sintéticos, envía ``ETag``/``Last-Modified``, contesta ``304`` a los GET
+condicionales y puede añadir un retardo fijo por petición. Cuenta las
+peticiones recibidas por ruta para comprobar cuántas llegaron realmente y el
+máximo de peticiones atendidas a la vez; con ``caido = True`` responde ``503``
+a todo.
+"""
+import hashlib
+import json
+import socket
+import threading
+import time
+from collections import Counter
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+
+def _escala(nombre):
+    # Distinta por país pero reproducible, para que las comparaciones no se superpongan
+    return 1 + sum(map(ord, nombre)) % 7
+
+
+def _pais(nombre):
+    k = _escala(nombre)
+    return {'country': nombre, 'cases': 1_000_000 * k, 'todayCases': 1200 * k, 'deaths': 20_000 * k,
+            'todayDeaths': 15 * k, 'recovered': 950_000 * k, 'active': 30_000 * k,
+            'population': 33_000_000 * (8 - k), 'updated': 1_700_000_000_000}
+
+
+def _historico(nombre, dias):
+    fechas = np.arange('2020-01-22', '2023-03-10', dtype='datetime64[D]')
+    dia = np.arange(fechas.size)
+    # Olas semestrales sobre una tendencia lineal
+    nuevos = 500 * _escala(nombre) * (1.2 + np.sin(2 * np.pi * dia / 180 + _escala(nombre)))
+    casos = np.cumsum(nuevos).round()
+    if dias != 'all':
+        fechas, casos = fechas[-int(dias):], casos[-int(dias):]
+    claves = [f"{f.month}/{f.day}/{f.year % 100}" for f in fechas.astype(object)]
+    serie = dict(zip(claves, casos.tolist()))
+    return {'country': nombre, 'timeline': {'cases': serie, 'deaths': serie, 'recovered': serie}}
+
+
+def _pronostico(lat, lon, dias):
+    # Respuesta con la forma de Open-Meteo: serie horaria desde hoy a las 00:00
+    horas = np.arange(np.datetime64('today', 'h'), np.datetime64('today', 'h') + 24 * dias)
+    fase = 2 * np.pi * np.arange(horas.size) / 24
+    return {
+        'latitude': lat, 'longitude': lon,
+        'current_weather': {'temperature': 20.0 - lat / 10, 'windspeed': 3.5},
+        'hourly': {
+            'time': np.datetime_as_string(horas, unit='m').tolist(),
+            'temperature_2m': (18 - lat / 10 + 5 * np.sin(fase)).round(1).tolist(),
+            'relativehumidity_2m': (70 + 15 * np.cos(fase)).round().tolist(),
+            'precipitation': np.where(np.sin(fase / 7) > 0.8, 0.4, 0.0).tolist(),
+            'wind_speed_10m': (3 + np.cos(fase)).round(1).tolist(),
+        },
+    }
+
+
+class ServidorStub:
+    """``with ServidorStub(retardo=0.2) as stub: requests.get(stub.url + '/countries/Peru')``"""
+
+    def __init__(self, retardo=0.0):
+        self.retardo = retardo
+        self.peticiones = Counter()
+        self.respuestas_304 = 0
+        self.caido = False
+        self.simultaneas = self.simultaneas_max = 0
+        self._cerrojo = threading.Lock()
+        self.ultima_modificacion = formatdate(time.time(), usegmt=True)
+        stub = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                # Cabeceras y cuerpo van en escrituras separadas: sin esto, Nagle +
+                # ACK retrasado añaden ~40 ms por respuesta en conexiones keep-alive
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def do_GET(self):
+                with stub._cerrojo:
+                    stub.simultaneas += 1
+                    stub.simultaneas_max = max(stub.simultaneas_max, stub.simultaneas)
+                try:
+                    self._responder()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # el cliente abandonó la petición (timeout)
+                finally:
+                    with stub._cerrojo:
+                        stub.simultaneas -= 1
+
+            def _responder(self):
+                ruta = urlparse(self.path)
+                partes = ruta.path.strip('/').split('/')
+                stub.peticiones[ruta.path] += 1
+                if stub.retardo:
+                    time.sleep(stub.retardo)
+                if stub.caido:
+                    self.send_error(503)
+                    return
+                if ruta.path.endswith('/forecast'):
+                    # Como Open-Meteo: coordenadas separadas por comas devuelven una lista
+                    consulta = parse_qs(ruta.query)
+                    dias = int(consulta.get('forecast_days', ['7'])[0])
+                    datos = [_pronostico(float(lat), float(lon), dias)
+                             for lat, lon in zip(consulta['latitude'][0].split(','),
+                                                 consulta['longitude'][0].split(','))]
+                    datos = datos if len(datos) > 1 else datos[0]
+                elif len(partes) == 2 and partes[0] in ('countries', 'historical'):
+                    # Como disease.sh: "a,b,c" devuelve una lista en el mismo orden
+                    nombres = partes[1].split(',')
+                    if partes[0] == 'countries':
+                        datos = [_pais(n) for n in nombres]
+                    else:
+                        dias = parse_qs(ruta.query).get('lastdays', ['30'])[0]
+                        datos = [_historico(n, dias) for n in nombres]
+                    datos = datos if len(datos) > 1 else datos[0]
+                else:
+                    self.send_error(404)
+                    return
+                cuerpo = json.dumps(datos).encode()
+                etag = '"' + hashlib.md5(cuerpo).hexdigest() + '"'
+                if self.headers.get('If-None-Match') == etag:
+                    stub.respuestas_304 += 1
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(cuerpo)))
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', stub.ultima_modificacion)
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def log_message(self, *args):
+                pass
+
+        self._servidor = ThreadingHTTPServer(('127.0.0.1', 0), Manejador)
+        self._servidor.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._servidor.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self._servidor.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    @property
+    def total(self):
+        return sum(self.peticiones.values())
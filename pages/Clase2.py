@@ -1,10 +1,17 @@
 import dash
-from dash import html, dcc, callback, Input, Output, State
+from dash import html, dcc, callback, Input, Output, State, ctx
+from dash.exceptions import PreventUpdate
 import numpy as np
 import plotly.graph_objects as go
+from utils.campo_vectorial import trazas_quiver, ventana_desde_relayout, campo_en_ventana, flechas_por_eje
+from utils.expresiones import compilar
+from utils.trayectorias import semillas_malla, integrar_rk4, a_traza_unica
 
 dash.register_page(__name__, path='/pagina3', name='Campo Vectorial')
 
+# Cada semilla guarda (pasos / guardar_cada + 1) posiciones por coordenada
+MAX_SEMILLAS = 2500
+
 layout = html.Div([
     html.Div([
         html.H2('Campo Vectorial 2D', className='title'),
@@ -34,6 +41,23 @@ layout = html.Div([
             dcc.Input(id='input-n', type='number', value=15, className="input-field"),
         ], className='input-group'),
 
+        html.Div([
+            html.Label("Modo"),
+            dcc.RadioItems(
+                id='input-modo',
+                options=[
+                    {'label': ' Vectores', 'value': 'vectores'},
+                    {'label': ' Lineas de flujo', 'value': 'flujo'},
+                ],
+                value='vectores', inline=True, inputStyle={'marginLeft': '10px'},
+            ),
+        ], className='input-group'),
+
+        html.Div([
+            html.Label("Semillas (lineas de flujo)"),
+            dcc.Input(id='input-semillas', type='number', value=400, className="input-field"),
+        ], className='input-group'),
+
         html.Button('Generar Campo Vectorial', id='btn-generate', className='btn-generar'),
 
         #Ejemplos
@@ -56,69 +80,79 @@ layout = html.Div([
     ], className='content right'),
 ],className='page-container')
 
+def trazas_flujo(f_x, f_y, xmax, ymax, semillas, pasos=500, t_final=10.0):
+    # Todas las semillas se integran en un solo lote y se dibujan como una traza
+    semillas = int(min(max(semillas or 1, 1), MAX_SEMILLAS))
+    x0, y0 = semillas_malla(xmax, ymax, semillas)
+    tray_x, tray_y = integrar_rk4(f_x, f_y, x0, y0, t_final / pasos, pasos,
+                                  (-xmax * 1.1, xmax * 1.1, -ymax * 1.1, ymax * 1.1),
+                                  guardar_cada=5)
+    xs, ys = a_traza_unica(tray_x, tray_y)
+    return go.Scattergl(x=xs, y=ys, mode='lines', line=dict(color='blue', width=1),
+                        hoverinfo='skip', showlegend=False)
+
 #### Callback #### 
 @callback(
     [Output("vector-field-graph", "figure"),
     Output("info-campo", "children")],
     Input("btn-generate", "n_clicks"),
+    Input("vector-field-graph", "relayoutData"),
     State("input-fx", "value"),
     State("input-fy", "value"),
     State("input-xmax", "value"),
     State("input-ymax", "value"),
     State("input-n", "value"),
+    State("input-modo", "value"),
+    State("input-semillas", "value"),
     prevent_initial_call=False
 )
-def graficar_campo(n_clicks, fx_str, fy_str, xmax, ymax, n):
-    x = np.linspace(-xmax, xmax, n)
-    y = np.linspace(-ymax, ymax, n)
+def graficar_campo(n_clicks, relayout, fx_str, fy_str, xmax, ymax, n, modo='vectores', semillas=400):
+    # Un zoom/paneo solo reevalúa la ventana visible; el botón y el doble clic
+    # (autorange) vuelven a la vista completa
+    ventana = None
+    if ctx.triggered_id == "vector-field-graph":
+       autorange = relayout and (relayout.get('xaxis.autorange') or relayout.get('yaxis.autorange'))
+       ventana = ventana_desde_relayout(relayout, xmax, ymax)
+       if (ventana is None and not autorange) or modo == 'flujo':
+          raise PreventUpdate
+
+    # Mismo tope de flechas que con zoom (PRESUPUESTO_FLECHAS)
+    m = flechas_por_eje(n)
+    x = np.linspace(-xmax, xmax, m)
+    y = np.linspace(-ymax, ymax, m)
     X, Y = np.meshgrid(x, y)
     info_mensaje = ""
+    f_x = f_y = None
     try:
-       diccionario = {
-            'X': X,
-            'Y': Y,
-            'x': X,
-            'y': Y,
-            'np': np,
-            'sin': np.sin,
-            'cos': np.cos,
-            'tan': np.tan,
-            'exp': np.exp,
-            'pi': np.pi,
-            'e': np.e,
-            'log': np.log,
-       }
-
-       # Evaluar las funciones en el contexto controlado
-       fx = eval(fx_str, {}, diccionario)
-       fy = eval(fy_str, {}, diccionario)
+       # Compilar (o recuperar de la caché) y evaluar sobre la malla
+       f_x, f_y = compilar(fx_str), compilar(fy_str)
+       if ventana is not None:
+          X, Y, fx, fy = campo_en_ventana(fx_str, fy_str, xmax, ymax, n, ventana)
+       else:
+          fx = f_x(X, Y)
+          fy = f_y(X, Y)
 
        mag = np.sqrt(fx**2 + fy**2)
        mag_max = np.max(mag)
        mag_min = np.min(mag)
        info_mensaje = f"Magnitud Máxima: {mag_max:.2f} | Magnitud Mínima: {mag_min:.2f}"
+       if ventana is not None:
+          info_mensaje += f" | Flechas visibles: {np.size(X)}"
     except Exception as error:
        # En caso de error, usar vectores nulos y mostrar mensaje de error
        fx = np.zeros_like(X)
        fy = np.zeros_like(Y)
        info_mensaje = f"Error en las ecuaciones: {str(error)}"
+    if modo != 'flujo' and m < n:
+       info_mensaje += f" | Mallado limitado a {m} flechas por eje"
 
     # Construir la figura (se hace siempre, tanto en try como en except)
-    fig = go.Figure()
-    for i in range(n):
-       for j in range(n):
-          x0, y0 = X[i, j], Y[i, j]
-          x1, y1 = x0 + fx[i, j], y0 + fy[i, j]
-
-          fig.add_trace(go.Scatter(
-              x=[x0, x1],
-              y=[y0, y1],
-              mode='lines+markers',
-              line=dict(color='blue', width=2),
-              marker=dict(size=[3, 5], color=['blue', 'red']),
-              showlegend=False,
-              hovertemplate=f"Punto: ({x0:.1f}, {y0:.1f})<br>Vector: ({fx[i, j]:.2f}, {fy[i, j]:.2f})"
-          ))
+    if modo == 'flujo' and f_x is not None:
+       fig = go.Figure(data=[trazas_flujo(f_x, f_y, xmax, ymax, semillas or 400)])
+    else:
+       # Con zoom las flechas se reducen en proporción para que no tapen la ventana
+       escala = (ventana[1] - ventana[0]) / (2.2 * xmax) if ventana else 1.0
+       fig = go.Figure(data=trazas_quiver(X, Y, fx, fy, escala=escala))
 
     fig.update_layout(
         title=dict(
@@ -135,17 +169,19 @@ def graficar_campo(n_clicks, fx_str, fy_str, xmax, ymax, n):
             xanchor="center", x=0.5
         ),
         margin=dict(l=20, r=40, t=80, b=40),
+        # Cambia con cada clic: el botón reinicia el zoom, el paneo lo conserva
+        uirevision=n_clicks,
     )
 
     fig.update_xaxes(
         showgrid=True, gridwidth=1, gridcolor='lightgray',
         zeroline=True, zerolinewidth=2, zerolinecolor='gray',
-        range=[-xmax*1.1, xmax*1.1]
+        range=[ventana[0], ventana[1]] if ventana else [-xmax*1.1, xmax*1.1]
     )
     fig.update_yaxes(
         showgrid=True, gridwidth=1, gridcolor='lightgray',
         zeroline=True, zerolinewidth=2, zerolinecolor='gray',
-        range=[-ymax*1.1, ymax*1.1]
+        range=[ventana[2], ventana[3]] if ventana else [-ymax*1.1, ymax*1.1]
     )
 
     return fig, info_mensaje
\ No newline at end of file
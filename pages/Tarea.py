@@ -1,8 +1,9 @@
 import dash
-from dash import html, dcc, callback, Output, Input
+from dash import html, dcc, callback, Output, Input, State, Patch, ctx
 import dash_bootstrap_components as dbc
 import numpy as np
 import plotly.graph_objects as go
+from utils.crecimiento import MODELOS_CRECIMIENTO, curvas_crecimiento
 
 dash.register_page(__name__, path="/pagina2", name="Página 2")
 
@@ -61,6 +62,32 @@ graph_card = dbc.Card(
     className="shadow-lg rounded-4 bg-white text-dark h-100",
 )
 
+sweep_card = dbc.Card(
+    [
+        dbc.CardHeader(html.H5("Barrido animado de parámetros", className="mb-0"), className="text-center"),
+        dbc.CardBody([
+            dbc.Row([
+                dbc.Col([
+                    dbc.Label("Modelo"),
+                    dcc.Dropdown(id="dropdown-modelo-crecimiento",
+                                 options=[{"label": v, "value": k} for k, v in MODELOS_CRECIMIENTO.items()],
+                                 value="logistico", clearable=False),
+                ], xs=12, md=4),
+                dbc.Col([
+                    dbc.Label("Parámetro a barrer"),
+                    dcc.RadioItems(id="radio-barrido", options=[{"label": " r", "value": "r"}, {"label": " K", "value": "k"}],
+                                   value="r", inline=True, inputStyle={"marginLeft": "10px"}),
+                ], xs=12, md=4),
+                dbc.Col([
+                    dbc.Button("Generar animación", id="btn-animar", color="primary", className="mt-4"),
+                ], xs=12, md=4),
+            ], className="mb-3"),
+            dcc.Graph(id="graph-barrido", style={"height": "520px"}, config={"displayModeBar": True}, responsive=True),
+        ])
+    ],
+    className="shadow-lg rounded-4 bg-white text-dark",
+)
+
 # --------- LAYOUT ----------
 layout = dbc.Container([
     dbc.Card([
@@ -68,7 +95,10 @@ layout = dbc.Container([
             dbc.Row([
                 dbc.Col(params_card, xs=12, lg=6, className="mb-4"),
                 dbc.Col(graph_card,  xs=12, lg=6, className="mb-4"),
-            ], className="g-4 align-items-stretch")
+            ], className="g-4 align-items-stretch"),
+            dbc.Row([
+                dbc.Col(sweep_card, xs=12),
+            ], className="g-4"),
         ])
     ],
     className="shadow-lg rounded-4",
@@ -80,31 +110,102 @@ layout = dbc.Container([
 
 
 # --------- CALLBACKS ----------
-@callback(
-    Output("val-p0", "children"), Output("val-r", "children"),
-    Output("val-k", "children"), Output("val-t", "children"),
-    Input("slider-p0", "value"), Input("slider-r", "value"),
-    Input("slider-k", "value"), Input("slider-t", "value"),
-)
-def show_values(p0, r, k, t):
-    return f"{p0}", f"{r:.2f}", f"{k}", f"{t}"
+def curva_logistica(p0, r, k, t):
+    t = max(t, 1)
+    x = np.linspace(0, t, 400)
+    return x, curvas_crecimiento("logistico", p0, r, k, x)
 
+
+def figura_logistica(x, y):
+    # Malla uniforme: x0/dx en lugar del arreglo x, así un cambio de t solo mueve dx
+    fig = go.Figure()
+    fig.add_scatter(x0=x[0], dx=x[1] - x[0], y=np.round(y, 2), mode="lines", name="P(t)")
+    fig.update_layout(
+        title={'text': 'Modelo logístico de crecimiento poblacional', 'x': 0.07},  
+        xaxis_title="Tiempo(t)", yaxis_title="Población P(t)",
+        height=520, margin=dict(l=50, r=30, t=50, b=50)
+    )
+    return fig
+
+
+# Un solo callback para etiquetas y gráfica: tras el primer render, arrastrar un
+# slider solo envía los nuevos arreglos x/y (Patch), no la figura ni el layout.
 @callback(
     Output("graph", "figure"),
+    Output("val-p0", "children"), Output("val-r", "children"),
+    Output("val-k", "children"), Output("val-t", "children"),
     Input("btn-generar", "n_clicks"),
     Input("slider-p0", "value"), Input("slider-r", "value"),
     Input("slider-k", "value"), Input("slider-t", "value"),
     prevent_initial_call=False
 )
 def plot_logistic(_, p0, r, k, t):
-    k = max(k, 1e-6); p0 = max(p0, 1e-6); t = max(t, 1)
+    x, y = curva_logistica(p0, r, k, t)
+    if ctx.triggered_id in (None, "btn-generar"):
+        figura = figura_logistica(x, y)
+    else:
+        figura = Patch()
+        # x solo depende de t; con los demás sliders basta con enviar y
+        if ctx.triggered_id == "slider-t":
+            figura["data"][0]["dx"] = x[1] - x[0]
+        figura["data"][0]["y"] = np.round(y, 2)
+    return figura, f"{p0}", f"{r:.2f}", f"{k}", f"{t}"
+
+
+# Rango de cada barrido (coincide con el de su slider)
+RANGOS_BARRIDO = {"r": (0.01, 1.0), "k": (100, 10000)}
+N_FRAMES = 60
+
+
+@callback(
+    Output("graph-barrido", "figure"),
+    Input("btn-animar", "n_clicks"),
+    State("dropdown-modelo-crecimiento", "value"),
+    State("radio-barrido", "value"),
+    State("slider-p0", "value"), State("slider-r", "value"),
+    State("slider-k", "value"), State("slider-t", "value"),
+    prevent_initial_call=True
+)
+def animar_barrido(_, modelo, parametro, p0, r, k, t):
+    # Todos los frames en una sola evaluación (N_FRAMES x 400); la animación corre en el navegador
+    t = max(t, 1)
     x = np.linspace(0, t, 400)
-    y = k / (1 + ((k - p0)/p0) * np.exp(-r * x))
-    fig = go.Figure()
-    fig.add_scatter(x=x, y=y, mode="lines", name="P(t)")
+    valores = np.linspace(*RANGOS_BARRIDO[parametro], N_FRAMES)
+    columna = valores[:, None]
+    if parametro == "r":
+        Y = curvas_crecimiento(modelo, p0, columna, k, x)
+    else:
+        Y = curvas_crecimiento(modelo, p0, r, columna, x)
+    Y = np.round(Y, 2)
+
+    etiqueta = "r" if parametro == "r" else "K"
+    formato = "{:.2f}" if parametro == "r" else "{:.0f}"
+    nombres = [formato.format(v) for v in valores]
+    frames = [go.Frame(data=[go.Scatter(y=Y[i])], name=nombres[i]) for i in range(N_FRAMES)]
+
+    fig = go.Figure(
+        data=[go.Scatter(x0=0, dx=x[1] - x[0], y=Y[0], mode="lines", name="P(t)")],
+        frames=frames,
+    )
     fig.update_layout(
-        title={'text': 'Modelo logístico de crecimiento poblacional', 'x': 0.07},  
+        title={'text': f'Modelo {MODELOS_CRECIMIENTO[modelo].lower()}: barrido de {etiqueta}', 'x': 0.07},
         xaxis_title="Tiempo(t)", yaxis_title="Población P(t)",
-        height=520, margin=dict(l=50, r=30, t=50, b=50)
+        xaxis=dict(range=[0, t]), yaxis=dict(range=[0, float(np.nanmax(Y)) * 1.05]),
+        height=520, margin=dict(l=50, r=30, t=50, b=50),
+        updatemenus=[dict(
+            type="buttons", showactive=False, x=0.0, y=-0.15, xanchor="left",
+            buttons=[
+                dict(label="▶", method="animate",
+                     args=[None, dict(frame=dict(duration=80, redraw=False), fromcurrent=True, transition=dict(duration=0))]),
+                dict(label="❚❚", method="animate",
+                     args=[[None], dict(frame=dict(duration=0, redraw=False), mode="immediate")]),
+            ],
+        )],
+        sliders=[dict(
+            x=0.1, y=-0.1, len=0.9, currentvalue=dict(prefix=f"{etiqueta} = "),
+            steps=[dict(method="animate", label=nombre,
+                        args=[[nombre], dict(mode="immediate", frame=dict(duration=0, redraw=False))])
+                   for nombre in nombres],
+        )],
     )
     return fig
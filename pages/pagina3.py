@@ -2,10 +2,25 @@ import dash
 from dash import html, dcc, callback, Input, Output, State
 import numpy as np
 import plotly.graph_objects as go
-from scipy.integrate import odeint
+from utils.diferido import importar_diferido
+from utils.graficos import trazas_banda
+
+# scipy/numba: se importan en el primer callback, no al arrancar la app
+compartimentos = importar_diferido('utils.compartimentos')
+estocastico = importar_diferido('utils.estocastico')
+analitica = importar_diferido('utils.analitica_sir')
 
 dash.register_page(__name__, path='/pagina4', name='Modelo SIR')
 
+OPCIONES_MODO = [
+    {'label': ' Determinista', 'value': 'determinista'},
+    {'label': ' Gillespie', 'value': 'gillespie'},
+    {'label': ' Tau-leaping', 'value': 'tau'},
+]
+MAX_REPLICAS = 10000
+# Gillespie avanza evento a evento: con más réplicas el callback tarda decenas de segundos
+MAX_REPLICAS_GILLESPIE = 1000
+
 layout = html.Div([
     html.Div([
         html.H2('Modelo SIR - Epidemologia', className='title'),
@@ -35,24 +50,47 @@ layout = html.Div([
             dcc.Input(id='input-tiempo', type='number', value=100, className="input-field"),
         ], className='input-group'),
 
+        html.Div([
+            html.Label("Tipo de simulación:"),
+            dcc.RadioItems(id='input-modo-sir', options=OPCIONES_MODO, value='determinista',
+                           inline=True, inputStyle={'marginLeft': '10px'}),
+        ], className='input-group'),
+
+        html.Div([
+            html.Label("Réplicas / Semilla (estocástico):"),
+            dcc.Input(id='input-replicas-sir', type='number', value=200, className="input-field"),
+            dcc.Input(id='input-semilla-sir', type='number', value=0, className="input-field"),
+        ], className='input-group'),
+
         html.Button('Simular Epidemia', id='btn-simular', className='btn-generar'),
     ], className='content left'),
 
     html.Div([
         html.H2('Evolucion de la Epidemia', className='title'),
         dcc.Graph(id='grafica-sir', style={'height': '470px'}, config={'displayModeBar': True}, responsive=True),
+
+        html.Div(className='covid-stats-grid', style={'marginTop': '12px'}, children=[
+            html.Div(className='stat-card', children=[
+                html.P('R0', className='stat-title'),
+                html.P(id='sir-R0', className='stat-value')
+            ]),
+            html.Div(className='stat-card', children=[
+                html.P('Umbral de inmunidad', className='stat-title'),
+                html.P(id='sir-umbral', className='stat-value')
+            ]),
+            html.Div(className='stat-card', children=[
+                html.P('Tamaño final', className='stat-title'),
+                html.P(id='sir-tamano-final', className='stat-value')
+            ]),
+            html.Div(className='stat-card', children=[
+                html.P('Pico de infectados', className='stat-title'),
+                html.P(id='sir-pico', className='stat-value')
+            ]),
+        ]),
     ], className='content right'),
 ],className='page-container')
 
 
-#Modelo SIR
-def modelo_sir(y, t , beta, gamma, N):
-    S, I, R = y
-    dSdt = -beta * S * I / N
-    dIdt = beta * S * I / N - gamma * I
-    dRdt = gamma * I
-    return [dSdt, dIdt, dRdt]
-
 #### Callback ###
 @callback(
     Output('grafica-sir', 'figure'),
@@ -62,25 +100,42 @@ def modelo_sir(y, t , beta, gamma, N):
     State('input-gamma', 'value'),
     State('input-I0', 'value'),
     State('input-tiempo', 'value'),
+    State('input-modo-sir', 'value'),
+    State('input-replicas-sir', 'value'),
+    State('input-semilla-sir', 'value'),
     prevent_initial_call=False
 )
 
-def simular_epidemia(n_clicks, N, beta, gamma, I0, tiempo_max):
+def simular_epidemia(n_clicks, N, beta, gamma, I0, tiempo_max, modo='determinista', replicas=200, semilla=0):
     S0 = N - I0
     R0_inicial = 0
-    y0 = [S0, I0, R0_inicial]
 
     t = np.linspace(0, tiempo_max, 200)
 
+    banda = None
     try:
-        solucion = odeint(modelo_sir, y0, t, args=(beta, gamma, N))
-        S, I, R = solucion.T
-    except Exception as e:
+        params = {'beta': beta, 'gamma': gamma, 'N': N}
+        if modo in ('gillespie', 'tau'):
+            # Mediana de las réplicas como curva principal y banda del 5% al 95%
+            tope = MAX_REPLICAS_GILLESPIE if modo == 'gillespie' else MAX_REPLICAS
+            replicas = int(min(max(replicas or 1, 1), tope))
+            resultado = estocastico.simular_replicas(compartimentos.SIR, params, t, {'I': I0}, replicas=replicas,
+                                                     metodo=modo, semilla=int(semilla or 0))
+            inferior, mediana, superior = estocastico.bandas(resultado)
+            S, I, R = mediana.T
+            banda = (inferior, superior)
+        else:
+            solucion = compartimentos.SIR.simular(params, t, {'I': I0})
+            S, I, R = solucion.T
+    except Exception:
         S = np.full_like(t, S0)
         I = np.full_like(t, I0)
         R = np.full_like(t, R0_inicial)
 
     fig = go.Figure()
+    if banda is not None:
+        for k, color in enumerate(['blue', 'red', 'green']):
+            fig.add_traces(trazas_banda(t, banda[0][:, k], banda[1][:, k], color))
 
     fig.add_trace(go.Scatter(
         x=t, y=S,
@@ -133,6 +188,27 @@ def simular_epidemia(n_clicks, N, beta, gamma, I0, tiempo_max):
 
     return fig
 
-        
 
-    
\ No newline at end of file
+# Panel analítico: se actualiza al escribir, sin esperar al botón ni integrar la curva
+@callback(
+    Output('sir-R0', 'children'),
+    Output('sir-umbral', 'children'),
+    Output('sir-tamano-final', 'children'),
+    Output('sir-pico', 'children'),
+    Input('input-N', 'value'),
+    Input('input-beta', 'value'),
+    Input('input-gamma', 'value'),
+    Input('input-I0', 'value'),
+)
+def analitica_sir(N, beta, gamma, I0):
+    try:
+        metricas = analitica.resumen(float(beta), float(gamma), float(N), float(I0))
+    except (TypeError, ValueError, ZeroDivisionError):
+        return "N/A", "N/A", "N/A", "N/A"
+
+    return (
+        f"{metricas['R0']:.2f}",
+        f"{metricas['umbral'] * 100:.1f} %",
+        f"{metricas['ataque'] * 100:.1f} % ({metricas['casos_totales']:,.0f})",
+        f"{metricas['pico']:,.0f} (día {metricas['dia_pico']:.1f})",
+    )
@@ -3,10 +3,41 @@ from dash import html, dcc, callback, Input, Output, State
 import numpy as np
 import plotly.graph_objects as go
 import requests
-from datetime import datetime
+import os
+from urllib.parse import urlparse
+from utils.cache_http import cache, formatear_edad
+from utils.cliente_http import en_paralelo, sesion
+from utils.diferido import importar_diferido
+from utils.historico import AlmacenHistorico, apilar, media_movil, nuevos_diarios
+from utils.precarga import precargador
+
+# scipy.optimize y los modelos solo hacen falta al calibrar
+calibracion = importar_diferido('utils.calibracion')
 
 dash.register_page(__name__, path='/pagina5', name='Covid-19')
 
+API_COVID = os.environ.get('API_COVID', 'https://disease.sh/v3/covid-19')
+# Segundos que cada respuesta se sirve sin red y ventana extra en la que se
+# sirve vieja mientras se revalida (disease.sh actualiza cada ~10 min)
+TTL_PAIS, SWR_PAIS = 10 * 60, 60 * 60
+TTL_HISTORICO, SWR_HISTORICO = 6 * 60 * 60, 24 * 60 * 60
+TIMEOUT = 10
+
+OPCIONES_PAISES = [
+    {'label': 'Peru', 'value': 'Peru'},
+    {'label': 'Colombia', 'value': 'Colombia'},
+    {'label': 'Estados Unidos', 'value': 'USA'},
+    {'label': 'India', 'value': 'India'},
+    {'label': 'Brasil', 'value': 'Brazil'},
+]
+PAISES_COMPARACION = ['Peru', 'Colombia', 'Brazil']
+OPCIONES_METRICA = [
+    {'label': 'Acumulados', 'value': 'acumulados'},
+    {'label': 'Nuevos diarios', 'value': 'diarios'},
+    {'label': 'Media móvil 7 días', 'value': 'media7'},
+]
+COLORES_PAISES = ['#e6b800', '#d62728', '#1f77b4', '#2ca02c', '#9467bd']
+
 layout = html.Div([
     html.Div([
         html.H2('Covid-19', className='title'),
@@ -16,13 +47,7 @@ layout = html.Div([
                 html.Label("Seleccione el país:"),
                 dcc.Dropdown(
                     id='dropdown-pais',
-                    options=[
-                        {'label': 'Peru', 'value': 'Peru'},
-                        {'label': 'Colombia', 'value': 'Colombia'},
-                        {'label': 'Estados Unidos', 'value': 'USA'},
-                        {'label': 'India', 'value': 'India'},
-                        {'label': 'Brasil', 'value': 'Brazil'},
-                    ],
+                    options=OPCIONES_PAISES,
                     value='Peru',
                     style={'width': '100%'},
                     className="input-field",
@@ -52,6 +77,50 @@ layout = html.Div([
             ]),
 
         ], className='covid-controls'),
+
+        html.H3('Comparar países', style={'marginTop': '24px'}),
+
+        html.Div([
+            html.Label("Países:"),
+            dcc.Dropdown(id='dropdown-paises-comparacion', options=OPCIONES_PAISES,
+                         value=PAISES_COMPARACION, multi=True, className="input-field"),
+        ], className='input-group'),
+
+        html.Div([
+            html.Label("Serie:"),
+            dcc.RadioItems(id='radio-metrica-comparacion', options=OPCIONES_METRICA, value='media7', inline=True),
+            dcc.Checklist(id='check-por-habitante', options=[{'label': ' Por 100 mil habitantes', 'value': 'si'}],
+                          value=['si']),
+        ], className='input-group'),
+
+        html.H3('Calibrar modelo', style={'marginTop': '24px'}),
+
+        html.Div([
+            html.Label("Modelo:"),
+            dcc.Dropdown(
+                id='dropdown-modelo-calibracion',
+                options=[{'label': 'SIR (β, γ)', 'value': 'SIR'}, {'label': 'SEIR (β, σ, γ)', 'value': 'SEIR'}],
+                value='SEIR',
+                clearable=False,
+                className="input-field",
+            ),
+        ], className='input-group'),
+
+        html.Div([
+            html.Label("Serie local (opcional, CSV o JSON):"),
+            dcc.Upload(id='upload-serie-covid', children=html.Div(id='nombre-serie-covid', children='Arrastre o seleccione un archivo'),
+                       className='input-field', style={'borderStyle': 'dashed', 'cursor': 'pointer'}),
+        ], className='input-group'),
+
+        html.Div([
+            html.Label("Población (si no viene de la API):"),
+            dcc.Input(id='input-poblacion-calibracion', type='number', value=None, className="input-field"),
+        ], className='input-group'),
+
+        html.Button('Ajustar a la serie', id='btn-calibrar-covid', className='btn-generar'),
+
+        # Último histórico y población descargados, para calibrar sin volver a llamar a la API
+        dcc.Store(id='store-historico-covid'),
     ], className='content left'),
 
     html.Div([
@@ -78,7 +147,17 @@ layout = html.Div([
 
         html.Div(className='covid-graph-container', children=[
             dcc.Graph(id='grafica-covid', style={'height': '470px', 'width': '100%'}, config={'displayModeBar': True}, responsive=True)
-        ])
+        ]),
+
+        html.Div(className='covid-graph-container', children=[
+            dcc.Graph(id='grafica-comparacion', style={'height': '420px', 'width': '100%'}, config={'displayModeBar': True}, responsive=True),
+            html.Div(id='info-comparacion'),
+        ]),
+
+        html.Div(className='covid-graph-container', children=[
+            dcc.Graph(id='grafica-calibracion', style={'height': '420px', 'width': '100%'}, config={'displayModeBar': True}, responsive=True),
+            html.Div(id='info-calibracion'),
+        ]),
 
     ], className='content right'),
 
@@ -87,25 +166,64 @@ layout = html.Div([
 #### FUNCIONES PARA CONECTAR A LA API #####
 def obtener_datos_pais(pais):
     try: 
-        url = f"https://disease.sh/v3/covid-19/countries/{pais}"
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
+        url = f"{API_COVID}/countries/{pais}"
+        return cache.obtener_json(url, ttl=TTL_PAIS, swr=SWR_PAIS, timeout=TIMEOUT, sesion=sesion)
+    except (requests.RequestException, ValueError) as e:
         print(f"Error al obtener datos para {pais}: {e}")
         return None
     
 def obtener_historico_pais(pais, dias):
     try:
-        url = f"https://disease.sh/v3/covid-19/historical/{pais}"
+        url = f"{API_COVID}/historical/{pais}"
         params = {'lastdays': dias}
-        response = requests.get(url, params=params ,timeout=10)
-        response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
+        return cache.obtener_json(url, params=params, ttl=TTL_HISTORICO, swr=SWR_HISTORICO,
+                                  timeout=TIMEOUT, sesion=sesion)
+    except (requests.RequestException, ValueError) as e:
         print(f"Error al obtener historico para {pais}: {e}")
         return None
     
+def obtener_datos_paises(paises):
+    # Una sola petición para varios países: /countries/Peru,Colombia,...
+    try:
+        url = f"{API_COVID}/countries/{','.join(paises)}"
+        datos = cache.obtener_json(url, ttl=TTL_PAIS, swr=SWR_PAIS, timeout=TIMEOUT, sesion=sesion)
+        return [datos] if isinstance(datos, dict) else datos
+    except (requests.RequestException, ValueError) as e:
+        print(f"Error al obtener datos para {', '.join(paises)}: {e}")
+        return None
+
+def obtener_historico_paises(paises, dias):
+    try:
+        url = f"{API_COVID}/historical/{','.join(paises)}"
+        params = {'lastdays': dias}
+        return cache.obtener_json(url, params=params, ttl=TTL_HISTORICO, swr=SWR_HISTORICO,
+                                  timeout=TIMEOUT, sesion=sesion)
+    except (requests.RequestException, ValueError) as e:
+        print(f"Error al obtener historico para {', '.join(paises)}: {e}")
+        return None
+
+# Histórico completo por país; cada rango de días es una vista de estos arreglos
+historicos = AlmacenHistorico(obtener_historico_pais, refresco=TTL_HISTORICO,
+                              descargar_varios=obtener_historico_paises)
+
+def texto_actualizado(mensaje, url, params=None):
+    # Antigüedad de la copia en caché (la precarga la mantiene fresca)
+    edad = formatear_edad(cache.edad(url, params))
+    return f"{mensaje} ({edad})." if edad else f"{mensaje}."
+
+def texto_error():
+    # Con el interruptor abierto la respuesta llega al instante: decirlo explícitamente
+    if cache.interruptor.abierto(urlparse(API_COVID).netloc):
+        return "Servicio disease.sh no disponible; se reintentará automáticamente."
+    return "No se pudieron actualizar los datos."
+
+# Precarga en segundo plano (ver utils.precarga): cada país, el histórico de todos
+# y la comparación por defecto
+for _opcion in OPCIONES_PAISES:
+    precargador.registrar(f"covid:{_opcion['value']}", obtener_datos_pais, _opcion['value'])
+precargador.registrar('covid:historicos', historicos.series, [o['value'] for o in OPCIONES_PAISES])
+precargador.registrar('covid:comparacion', obtener_datos_paises, PAISES_COMPARACION)
+
 def formatear_numero(numero): #150000 -> 150,000
     if numero is None:
         return "N/A"
@@ -119,17 +237,17 @@ def formatear_numero(numero): #150000 -> 150,000
     Output('total-recuperados', 'children'),
     Output('grafica-covid', 'figure'),
     Output('info-actualizado-covid', 'children'),
+    Output('store-historico-covid', 'data'),
     Input('btn-actualizar-covid', 'n_clicks'),
     State('dropdown-pais', 'value'),
-    State('dropdown-dias-covid', 'value'),
+    Input('dropdown-dias-covid', 'value'),
     prevent_initial_call=False
 )
 
 def actualizar_dashboard_covid(n_clicks, pais, dias): 
-    datos_actuales = obtener_datos_pais(pais)
-    historico = obtener_historico_pais(pais, dias)
+    datos_actuales, serie = en_paralelo((obtener_datos_pais, pais), (historicos.serie, pais))
 
-    if not datos_actuales or not historico:
+    if not datos_actuales or serie is None:
         fig = go.Figure()
         fig.add_annotation(
             text="Error al obtener datos", 
@@ -145,7 +263,7 @@ def actualizar_dashboard_covid(n_clicks, pais, dias):
             plot_bgcolor='white'
         )
 
-        return "N/A", "N/A", "N/A", "N/A", fig, "No se pudieron actualizar los datos."
+        return "N/A", "N/A", "N/A", "N/A", fig, texto_error(), dash.no_update
     
     total_casos = datos_actuales.get('cases', 0)
     casos_hoy = datos_actuales.get('todayCases', 0)
@@ -157,15 +275,10 @@ def actualizar_dashboard_covid(n_clicks, pais, dias):
     total_muertes_texto = formatear_numero(total_muertes)
     total_recuperados_texto = formatear_numero(total_recuperados)
 
-    timeline = historico.get('timeline', {})
-    casos_historico = timeline.get('cases', {})
-    muertes_historicas = timeline.get('deaths', {})
-
-    fechas = list(casos_historico.keys())
-    valores_casos = list(casos_historico.values())
-    valores_muertes = list(muertes_historicas.values())
-
-    fechas_dt = [datetime.strptime(fecha, '%m/%d/%y') for fecha in fechas]
+    # Vistas del histórico completo guardado en memoria (sin copiar ni pedir a la API)
+    fechas_dt, columnas = serie.ultimos(dias)
+    valores_casos = columnas['cases']
+    valores_muertes = columnas['deaths']
 
     fig = go.Figure()
     fig.add_trace(go.Scatter(
@@ -189,6 +302,134 @@ def actualizar_dashboard_covid(n_clicks, pais, dias):
         hovertemplate='Fecha: %{x|%Y-%m-%d}<br>Muertes: %{y}<extra></extra>'
     ))
 
+    # La calibración recibe el histórico completo: los días previos a la
+    # ventana mostrada fijan su estado inicial (ver calibracion.estado_inicial)
+    fechas_todas, columnas_todas = serie.ultimos('all')
+    casos_historico = dict(zip(np.datetime_as_string(fechas_todas).tolist(), columnas_todas['cases'].tolist()))
+    historico_guardado = {'pais': pais, 'poblacion': datos_actuales.get('population'), 'cases': casos_historico,
+                          'dias': None if dias in (None, 'all') else int(dias)}
+
     return (total_casos_texto, casos_hoy_texto, total_muertes_texto,
             total_recuperados_texto, fig,
-            f"Datos actualizados para {pais}.")
+            texto_actualizado(f"Datos actualizados para {pais}", f"{API_COVID}/countries/{pais}"),
+            historico_guardado)
+
+
+@callback(
+    Output('grafica-comparacion', 'figure'),
+    Output('info-comparacion', 'children'),
+    Input('dropdown-paises-comparacion', 'value'),
+    Input('radio-metrica-comparacion', 'value'),
+    Input('check-por-habitante', 'value'),
+    Input('dropdown-dias-covid', 'value'),
+    prevent_initial_call=False
+)
+def comparar_paises(paises, metrica, por_habitante, dias):
+    paises = [p for p in (paises or []) if p]
+    if not paises:
+        return go.Figure(), "Seleccione al menos un país."
+
+    # Dos peticiones masivas (una por endpoint) en paralelo, no una por país
+    datos_actuales, series = en_paralelo((obtener_datos_paises, paises), (historicos.series, paises))
+    paises = [p for p in paises if p in series]
+    if not paises:
+        return go.Figure(), texto_error()
+
+    # Matriz (países, días) sobre todo el histórico común; el rango se recorta al final
+    # para que las diferencias y la media móvil no pierdan los primeros días
+    fechas, matriz = apilar({p: series[p] for p in paises})
+    if metrica == 'diarios':
+        matriz = nuevos_diarios(matriz)
+    elif metrica == 'media7':
+        matriz = media_movil(nuevos_diarios(matriz), 7)
+
+    unidad = 'casos'
+    if por_habitante:
+        datos_actuales = datos_actuales or []
+        poblacion = {str(d.get('country', '')).lower(): d.get('population') for d in datos_actuales}
+        habitantes = np.array([poblacion.get(p.lower()) or np.nan for p in paises], dtype=float)
+        matriz = matriz / habitantes[:, None] * 1e5
+        unidad = 'casos por 100 mil hab.'
+
+    if dias not in (None, 'all'):
+        fechas, matriz = fechas[-int(dias):], matriz[:, -int(dias):]
+
+    fig = go.Figure()
+    for i, pais in enumerate(paises):
+        fig.add_trace(go.Scatter(
+            x=fechas, y=matriz[i], mode='lines', name=pais,
+            line=dict(color=COLORES_PAISES[i % len(COLORES_PAISES)], width=2),
+            hovertemplate=f'{pais}<br>Fecha: %{{x|%Y-%m-%d}}<br>Valor: %{{y:,.1f}}<extra></extra>'
+        ))
+    titulo = {'acumulados': 'Casos acumulados', 'diarios': 'Casos nuevos diarios',
+              'media7': 'Casos nuevos (media móvil 7 días)'}[metrica]
+    fig.update_layout(
+        title={'text': titulo, 'x': 0.05}, xaxis_title='Fecha', yaxis_title=unidad.capitalize(),
+        legend=dict(orientation='h', yanchor='bottom', y=1.0, xanchor='center', x=0.5),
+    )
+    return fig, f"{len(paises)} países, {fechas.size} días."
+
+
+@callback(
+    Output('nombre-serie-covid', 'children'),
+    Input('upload-serie-covid', 'filename'),
+    prevent_initial_call=True
+)
+def mostrar_archivo_serie(nombre):
+    return nombre or 'Arrastre o seleccione un archivo'
+
+
+@callback(
+    Output('grafica-calibracion', 'figure'),
+    Output('info-calibracion', 'children'),
+    Input('btn-calibrar-covid', 'n_clicks'),
+    State('dropdown-modelo-calibracion', 'value'),
+    State('upload-serie-covid', 'contents'),
+    State('upload-serie-covid', 'filename'),
+    State('store-historico-covid', 'data'),
+    State('input-poblacion-calibracion', 'value'),
+    prevent_initial_call=True
+)
+def calibrar_modelo(n_clicks, modelo, contenido, nombre_archivo, historico, poblacion):
+    # Prioridad: archivo local subido (se ajusta entero); si no hay, la ventana
+    # mostrada del último histórico descargado
+    ventana = None
+    try:
+        if contenido:
+            fechas, casos = calibracion.cargar_serie(calibracion.decodificar_upload(contenido), nombre_archivo or '')
+            origen = nombre_archivo
+        elif historico and historico.get('cases'):
+            fechas, casos = calibracion.serie_desde_timeline(historico['cases'])
+            origen = historico.get('pais')
+            ventana = historico.get('dias')
+            poblacion = poblacion or historico.get('poblacion')
+        else:
+            return go.Figure(), "Primero actualice los datos o suba una serie local."
+    except (ValueError, TypeError, KeyError, UnicodeDecodeError) as e:
+        return go.Figure(), f"No se pudo leer la serie: {e}"
+
+    if not poblacion or poblacion <= 0 or len(casos) < 3 or (ventana is not None and ventana < 3):
+        return go.Figure(), "Indique una población positiva y una serie de al menos 3 días."
+    if np.nanmax(casos) >= poblacion:
+        return go.Figure(), "La población debe ser mayor que los casos acumulados."
+
+    try:
+        resultado = calibracion.ajustar(casos, float(poblacion), modelo, ventana=ventana)
+    except Exception as e:
+        return go.Figure(), f"No se pudo ajustar el modelo: {e}"
+    parametros = resultado['parametros']
+    fechas, casos = fechas[-len(resultado['curva']):], casos[-len(resultado['curva']):]
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=fechas, y=casos, mode='markers', name='Casos observados',
+                             marker=dict(size=4, color='yellow')))
+    fig.add_trace(go.Scatter(x=fechas, y=resultado['curva'], mode='lines', name=f'Ajuste {modelo}',
+                             line=dict(color='red', width=2)))
+    fig.update_layout(xaxis_title='Fecha', yaxis_title='Casos acumulados',
+                      legend=dict(orientation='h', yanchor='bottom', y=1.0, xanchor='center', x=0.5))
+
+    texto_parametros = ", ".join(f"{p} = {v:.4f}" for p, v in parametros.items())
+    info = (f"{origen}: {texto_parametros} (R0 ≈ {parametros['beta'] / parametros['gamma']:.2f}) | "
+            f"{resultado['segundos']:.2f} s, {resultado['llamadas_integrador']} llamadas al integrador "
+            f"({resultado['escenarios']:,} escenarios)")
+    return fig, info
@@ -1,8 +1,16 @@
 import dash
 from dash import html, dcc, callback, Input, Output, State, exceptions as _dash_exceptions
+import time
 import numpy as np
 import plotly.graph_objects as go
-from scipy.integrate import odeint
+from plotly.subplots import make_subplots
+from utils.diferido import importar_diferido
+from utils.graficos import trazas_banda
+
+# scipy/numba: se importan en el primer callback, no al arrancar la app
+compartimentos = importar_diferido('utils.compartimentos')
+estocastico = importar_diferido('utils.estocastico')
+metapoblacion = importar_diferido('utils.metapoblacion')
 
 
 _PAGE_REGISTERED = False
@@ -30,6 +38,30 @@ def register_page_if_possible():
         return False
 
 
+OPCIONES_MODO = [
+    {'label': ' Determinista', 'value': 'determinista'},
+    {'label': ' Gillespie', 'value': 'gillespie'},
+    {'label': ' Tau-leaping', 'value': 'tau'},
+]
+MAX_REPLICAS = 10000
+# Gillespie simula cada evento: 10000 réplicas SEIR tardan ~40 s, 1000 unos 4 s en un núcleo
+MAX_REPLICAS_GILLESPIE = 1000
+
+PARAMETROS_SENSIBILIDAD = ('beta', 'sigma', 'gamma', 'E')
+ETIQUETAS_SENSIBILIDAD = {'beta': 'β', 'sigma': 'σ', 'gamma': 'γ', 'E': 'E0'}
+
+OPCIONES_BARRIDO = [
+    {'label': 'β (transmisión)', 'value': 'beta'},
+    {'label': 'σ (incubación)', 'value': 'sigma'},
+    {'label': 'γ (recuperación)', 'value': 'gamma'},
+]
+# Límite de escenarios por barrido (resolución máxima 200 x 200)
+MAX_RESOLUCION_BARRIDO = 200
+# Horizonte (días) de barrido y metapoblación: la salida crece con días x escenarios
+MAX_DIAS = 365
+MAX_PARCHES = 20000
+
+
 layout = html.Div([
     html.Div([
         html.H2('Modelo SEIR - Epidemiología', className='title'),
@@ -69,27 +101,76 @@ layout = html.Div([
             dcc.Input(id='seir-input-tiempo', type='number', value=160, className="input-field"),
         ], className='input-group'),
 
+        html.Div([
+            html.Label("Tipo de simulación:"),
+            dcc.RadioItems(id='seir-input-modo', options=OPCIONES_MODO, value='determinista',
+                           inline=True, inputStyle={'marginLeft': '10px'}),
+        ], className='input-group'),
+
+        html.Div([
+            html.Label("Réplicas / Semilla (estocástico):"),
+            dcc.Input(id='seir-input-replicas', type='number', value=200, className="input-field"),
+            dcc.Input(id='seir-input-semilla', type='number', value=0, className="input-field"),
+        ], className='input-group'),
+
         html.Button('Simular SEIR', id='btn-simular-seir', className='btn-generar'),
+
+        html.H3('Barrido de parámetros', style={'marginTop': '24px'}),
+
+        html.Div([
+            html.Label("Parámetro eje X:"),
+            dcc.Dropdown(id='seir-barrido-px', options=OPCIONES_BARRIDO, value='beta', clearable=False, className="input-field"),
+            dcc.Input(id='seir-barrido-x-min', type='number', value=0.1, step=0.01, className="input-field"),
+            dcc.Input(id='seir-barrido-x-max', type='number', value=1.0, step=0.01, className="input-field"),
+        ], className='input-group'),
+
+        html.Div([
+            html.Label("Parámetro eje Y:"),
+            dcc.Dropdown(id='seir-barrido-py', options=OPCIONES_BARRIDO, value='gamma', clearable=False, className="input-field"),
+            dcc.Input(id='seir-barrido-y-min', type='number', value=0.05, step=0.01, className="input-field"),
+            dcc.Input(id='seir-barrido-y-max', type='number', value=0.5, step=0.01, className="input-field"),
+        ], className='input-group'),
+
+        html.Div([
+            html.Label("Resolución de la grilla:"),
+            dcc.Input(id='seir-barrido-n', type='number', value=100, className="input-field"),
+        ], className='input-group'),
+
+        html.Button('Barrido SEIR', id='btn-barrido-seir', className='btn-generar'),
+
+        html.H3('Metapoblación', style={'marginTop': '24px'}),
+
+        html.Div([
+            html.Label("Número de parches (K):"),
+            dcc.Input(id='seir-meta-K', type='number', value=5000, className="input-field"),
+        ], className='input-group'),
+
+        html.Div([
+            html.Label("Movilidad / Vecinos por parche:"),
+            dcc.Input(id='seir-meta-movilidad', type='number', value=0.05, step=0.01, className="input-field"),
+            dcc.Input(id='seir-meta-vecinos', type='number', value=4, className="input-field"),
+        ], className='input-group'),
+
+        html.Button('Simular Metapoblación', id='btn-meta-seir', className='btn-generar'),
     ], className='content left'),
 
     html.Div([
         html.H2('Evolución del Modelo SEIR', className='title'),
         dcc.Graph(id='grafica-seir', style={'height': '520px'}, config={'displayModeBar': True}, responsive=True),
+        dcc.Graph(id='grafica-seir-sensibilidad', style={'height': '360px'}, config={'displayModeBar': True}, responsive=True),
+        html.Div(id='info-seir-sensibilidad'),
+        dcc.Graph(id='grafica-seir-barrido', style={'height': '420px'}, config={'displayModeBar': True}, responsive=True),
+        html.Div(id='info-seir-barrido'),
+        dcc.Graph(id='grafica-seir-meta', style={'height': '420px'}, config={'displayModeBar': True}, responsive=True),
+        html.Div(id='info-seir-meta'),
     ], className='content right'),
 ], className='page-container')
 
 
-def modelo_seir(y, t, beta, sigma, gamma, N):
-    S, E, I, R = y
-    dSdt = -beta * S * I / N
-    dEdt = beta * S * I / N - sigma * E
-    dIdt = sigma * E - gamma * I
-    dRdt = gamma * I
-    return [dSdt, dEdt, dIdt, dRdt]
-
-
 @callback(
     Output('grafica-seir', 'figure'),
+    Output('grafica-seir-sensibilidad', 'figure'),
+    Output('info-seir-sensibilidad', 'children'),
     Input('btn-simular-seir', 'n_clicks'),
     State('seir-input-N', 'value'),
     State('seir-input-beta', 'value'),
@@ -98,9 +179,12 @@ def modelo_seir(y, t, beta, sigma, gamma, N):
     State('seir-input-E0', 'value'),
     State('seir-input-I0', 'value'),
     State('seir-input-tiempo', 'value'),
+    State('seir-input-modo', 'value'),
+    State('seir-input-replicas', 'value'),
+    State('seir-input-semilla', 'value'),
     prevent_initial_call=False
 )
-def simular_seir(n_clicks, N, beta, sigma, gamma, E0, I0, tiempo_max):
+def simular_seir(n_clicks, N, beta, sigma, gamma, E0, I0, tiempo_max, modo='determinista', replicas=200, semilla=0):
     # Validate and set defaults
     try:
         N = float(N) if N is not None else 10000.0
@@ -116,20 +200,37 @@ def simular_seir(n_clicks, N, beta, sigma, gamma, E0, I0, tiempo_max):
 
     S0 = N - E0 - I0
     R0 = 0.0
-    y0 = [S0, E0, I0, R0]
 
     t = np.linspace(0, tiempo_max, 400)
 
+    banda = None
+    sens = None
     try:
-        sol = odeint(modelo_seir, y0, t, args=(beta, sigma, gamma, N))
-        S, E, I, R = sol.T
+        params = {'beta': beta, 'sigma': sigma, 'gamma': gamma, 'N': N}
+        if modo in ('gillespie', 'tau'):
+            # Mediana de las réplicas como curva principal y banda del 5% al 95%
+            tope = MAX_REPLICAS_GILLESPIE if modo == 'gillespie' else MAX_REPLICAS
+            replicas = int(min(max(replicas or 1, 1), tope))
+            resultado = estocastico.simular_replicas(compartimentos.SEIR, params, t, {'E': E0, 'I': I0}, replicas=replicas,
+                                                     metodo=modo, semilla=int(semilla or 0))
+            inferior, mediana, superior = estocastico.bandas(resultado)
+            S, E, I, R = mediana.T
+            banda = (inferior, superior)
+        else:
+            # Una sola integración da la trayectoria y todas las sensibilidades ∂y/∂θ
+            sol, sens = compartimentos.SEIR.sensibilidades(params, t, {'E': E0, 'I': I0}, PARAMETROS_SENSIBILIDAD)
+            S, E, I, R = sol.T
     except Exception:
+        sens = None
         S = np.full_like(t, S0)
         E = np.full_like(t, E0)
         I = np.full_like(t, I0)
         R = np.full_like(t, R0)
 
     fig = go.Figure()
+    if banda is not None:
+        for k, color in enumerate(['blue', 'orange', 'red', 'green']):
+            fig.add_traces(trazas_banda(t, banda[0][:, k], banda[1][:, k], color))
     fig.add_trace(go.Scatter(x=t, y=S, mode='lines', name='Susceptibles (S)', line=dict(color='blue')))
     fig.add_trace(go.Scatter(x=t, y=E, mode='lines', name='Expuestos (E)', line=dict(color='orange')))
     fig.add_trace(go.Scatter(x=t, y=I, mode='lines', name='Infectados (I)', line=dict(color='red')))
@@ -149,4 +250,191 @@ def simular_seir(n_clicks, N, beta, sigma, gamma, E0, I0, tiempo_max):
     fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='black', zeroline=True, zerolinewidth=2, zerolinecolor='black')
     fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='black', zeroline=True, zerolinewidth=2, zerolinecolor='black')
 
-    return fig
+    fig_sens, info_sens = figura_sensibilidad(t, I, sens, {'beta': beta, 'sigma': sigma, 'gamma': gamma, 'E': E0})
+    return fig, fig_sens, info_sens
+
+
+def figura_sensibilidad(t, I, sens, valores):
+    """Curvas θ·∂I/∂θ (∂I/∂E0 para E0) y elasticidades del pico de infectados."""
+    fig = go.Figure()
+    fig.update_layout(
+        title=dict(text='<b>Sensibilidad de I(t)</b>', font=dict(size=14, color='darkred'), x=0.5),
+        xaxis_title='Tiempo (días)',
+        yaxis_title='θ · ∂I/∂θ',
+        paper_bgcolor='lightyellow',
+        plot_bgcolor='white',
+        font=dict(family='Outfit', size=12, color='black'),
+        legend=dict(orientation='h', yanchor='bottom', y=0.99, xanchor='center', x=0.5),
+        margin=dict(l=20, r=40, t=60, b=40),
+    )
+    if sens is None:
+        return fig, 'Sensibilidades disponibles solo en modo determinista.'
+
+    k_pico = int(np.argmax(I))
+    elasticidades = []
+    for k, (nombre, color) in enumerate(zip(PARAMETROS_SENSIBILIDAD, ['purple', 'orange', 'green', 'gray'])):
+        d_I = sens[:, 2, k]
+        escala = 1.0 if nombre == 'E' else valores[nombre]
+        etiqueta = '∂I/∂E0' if nombre == 'E' else f"{ETIQUETAS_SENSIBILIDAD[nombre]}·∂I/∂{ETIQUETAS_SENSIBILIDAD[nombre]}"
+        fig.add_trace(go.Scatter(x=t, y=escala * d_I, mode='lines', name=etiqueta, line=dict(color=color)))
+        # En el pico dI/dt = 0, así que ∂I_pico/∂θ = ∂I/∂θ evaluada en t_pico
+        elasticidad = valores[nombre] * d_I[k_pico] / I[k_pico] if I[k_pico] else 0.0
+        elasticidades.append(f"{ETIQUETAS_SENSIBILIDAD[nombre]}: {elasticidad:+.2f}")
+
+    info = f"Elasticidad del pico de infectados (día {t[k_pico]:.0f}) — " + " | ".join(elasticidades)
+    return fig, info
+
+
+@callback(
+    Output('grafica-seir-barrido', 'figure'),
+    Output('info-seir-barrido', 'children'),
+    Input('btn-barrido-seir', 'n_clicks'),
+    State('seir-barrido-px', 'value'),
+    State('seir-barrido-x-min', 'value'),
+    State('seir-barrido-x-max', 'value'),
+    State('seir-barrido-py', 'value'),
+    State('seir-barrido-y-min', 'value'),
+    State('seir-barrido-y-max', 'value'),
+    State('seir-barrido-n', 'value'),
+    State('seir-input-N', 'value'),
+    State('seir-input-beta', 'value'),
+    State('seir-input-sigma', 'value'),
+    State('seir-input-gamma', 'value'),
+    State('seir-input-E0', 'value'),
+    State('seir-input-I0', 'value'),
+    State('seir-input-tiempo', 'value'),
+    prevent_initial_call=True
+)
+def barrido_seir(n_clicks, px, x_min, x_max, py, y_min, y_max, resolucion,
+                 N, beta, sigma, gamma, E0, I0, tiempo_max):
+    try:
+        N = float(N) if N is not None else 10000.0
+        base = {
+            'beta': float(beta) if beta is not None else 0.5,
+            'sigma': float(sigma) if sigma is not None else 1/5.2,
+            'gamma': float(gamma) if gamma is not None else 0.1,
+        }
+        E0 = float(E0) if E0 is not None else 0.0
+        I0 = float(I0) if I0 is not None else 1.0
+        tiempo_max = float(tiempo_max) if tiempo_max is not None else 160.0
+        if not 1 <= tiempo_max <= MAX_DIAS:
+            raise ValueError(f'horizonte fuera de [1, {MAX_DIAS}] días')
+        resolucion = int(min(max(resolucion or 100, 2), MAX_RESOLUCION_BARRIDO))
+        ejes_x = np.linspace(float(x_min), float(x_max), resolucion)
+        ejes_y = np.linspace(float(y_min), float(y_max), resolucion)
+    except (TypeError, ValueError):
+        return go.Figure(), 'Parámetros de barrido inválidos.'
+    if px == py:
+        return go.Figure(), 'Elija dos parámetros distintos para los ejes.'
+
+    # Todas las combinaciones se apilan en un único estado (4, resolucion**2)
+    PX, PY = np.meshgrid(ejes_x, ejes_y)
+    params = dict(base, N=N)
+    params[px] = PX.ravel()
+    params[py] = PY.ravel()
+    t = np.linspace(0, tiempo_max, int(tiempo_max) + 1)
+
+    inicio = time.perf_counter()
+    sol = compartimentos.SEIR.simular_lote(params, t, {'E': E0, 'I': I0}, registrar=('S', 'I'))
+    duracion = time.perf_counter() - inicio
+
+    S, I = sol[:, 0, :], sol[:, 1, :]
+    forma = PX.shape
+    pico = I.max(axis=0).reshape(forma)
+    dia_pico = t[I.argmax(axis=0)].reshape(forma)
+    ataque = (1 - S[-1] / N).reshape(forma) * 100
+
+    etiquetas = {o['value']: o['label'] for o in OPCIONES_BARRIDO}
+    fig = make_subplots(rows=1, cols=3, subplot_titles=('Pico de infectados', 'Día del pico', 'Tasa de ataque (%)'),
+                        horizontal_spacing=0.08)
+    for col, (z, escala, x_barra) in enumerate([(pico, 'Reds', 0.27), (dia_pico, 'Viridis', 0.63), (ataque, 'Blues', 1.0)], start=1):
+        fig.add_trace(go.Heatmap(
+            x=ejes_x, y=ejes_y, z=z, colorscale=escala,
+            colorbar=dict(x=x_barra, len=0.9, thickness=10),
+            hovertemplate=f"{px}: %{{x:.3f}}<br>{py}: %{{y:.3f}}<br>%{{z:.1f}}<extra></extra>",
+        ), row=1, col=col)
+        fig.update_xaxes(title_text=etiquetas[px], row=1, col=col)
+        fig.update_yaxes(title_text=etiquetas[py] if col == 1 else None, row=1, col=col)
+
+    fig.update_layout(
+        paper_bgcolor='lightyellow',
+        plot_bgcolor='white',
+        font=dict(family='Outfit', size=11, color='black'),
+        margin=dict(l=20, r=40, t=60, b=40),
+    )
+
+    info = f"{PX.size:,} escenarios integrados en {duracion:.2f} s"
+    return fig, info
+
+
+@callback(
+    Output('grafica-seir-meta', 'figure'),
+    Output('info-seir-meta', 'children'),
+    Input('btn-meta-seir', 'n_clicks'),
+    State('seir-meta-K', 'value'),
+    State('seir-meta-movilidad', 'value'),
+    State('seir-meta-vecinos', 'value'),
+    State('seir-input-N', 'value'),
+    State('seir-input-beta', 'value'),
+    State('seir-input-sigma', 'value'),
+    State('seir-input-gamma', 'value'),
+    State('seir-input-I0', 'value'),
+    State('seir-input-tiempo', 'value'),
+    prevent_initial_call=True
+)
+def simular_meta_seir(n_clicks, K, movilidad, vecinos, N, beta, sigma, gamma, I0, tiempo_max):
+    try:
+        K = int(min(max(K or 1, 1), MAX_PARCHES))
+        movilidad = float(movilidad) if movilidad is not None else 0.05
+        vecinos = int(vecinos) if vecinos is not None else 4
+        N = float(N) if N is not None else 10000.0
+        beta = float(beta) if beta is not None else 0.5
+        sigma = float(sigma) if sigma is not None else 1/5.2
+        gamma = float(gamma) if gamma is not None else 0.1
+        I0 = float(I0) if I0 is not None else 1.0
+        tiempo_max = float(tiempo_max) if tiempo_max is not None else 160.0
+        if not 1 <= tiempo_max <= MAX_DIAS:
+            raise ValueError(f'horizonte fuera de [1, {MAX_DIAS}] días')
+    except (TypeError, ValueError):
+        return go.Figure(), 'Parámetros de metapoblación inválidos.'
+
+    # N se interpreta como la población media de cada parche; el brote empieza en el parche 0
+    C = metapoblacion.matriz_movilidad(K, vecinos, movilidad)
+    N_parches = metapoblacion.poblaciones(K, total=N * K)
+    infectados = np.zeros(K)
+    infectados[0] = min(I0, N_parches[0])
+    t = np.linspace(0, tiempo_max, int(tiempo_max) + 1)
+
+    inicio = time.perf_counter()
+    sol = metapoblacion.simular_metapoblacion(C, N_parches, beta, sigma, gamma, t, infectados)
+    duracion = time.perf_counter() - inicio
+
+    totales = sol.sum(axis=2)
+    # Pico por parche como fracción de su población, dispuesto en una grilla casi cuadrada
+    pico = sol[:, 2, :].max(axis=0) / N_parches * 100
+    lado = int(np.ceil(np.sqrt(K)))
+    grilla = np.full(lado * lado, np.nan)
+    grilla[:K] = pico
+
+    fig = make_subplots(rows=1, cols=2, subplot_titles=('Total agregado', 'Pico por parche (% de su población)'),
+                        horizontal_spacing=0.12)
+    for k, (nombre, color) in enumerate([('S', 'blue'), ('E', 'orange'), ('I', 'red'), ('R', 'green')]):
+        fig.add_trace(go.Scatter(x=t, y=totales[:, k], mode='lines', name=nombre, line=dict(color=color)), row=1, col=1)
+    fig.add_trace(go.Heatmap(
+        z=grilla.reshape(lado, lado), colorscale='Reds', colorbar=dict(thickness=10),
+        customdata=np.arange(lado * lado).reshape(lado, lado),
+        hovertemplate="Parche %{customdata}<br>Pico: %{z:.1f} %<extra></extra>",
+    ), row=1, col=2)
+    fig.update_xaxes(title_text='Tiempo (días)', row=1, col=1)
+    fig.update_xaxes(showticklabels=False, row=1, col=2)
+    fig.update_yaxes(showticklabels=False, row=1, col=2)
+    fig.update_layout(
+        paper_bgcolor='lightyellow',
+        plot_bgcolor='white',
+        font=dict(family='Outfit', size=11, color='black'),
+        legend=dict(orientation='h', yanchor='bottom', y=1.08, xanchor='left', x=0),
+        margin=dict(l=20, r=40, t=60, b=40),
+    )
+
+    info = f"{K:,} parches, {C.nnz:,} contactos no nulos, integrado en {duracion:.2f} s"
+    return fig, info
@@ -2,8 +2,16 @@ from dash import html, dcc, callback, Input, Output, State, exceptions as _dash_
 import dash
 import requests
 import plotly.graph_objects as go
-import pandas as pd
+import numpy as np
+import os
+import time
 from datetime import datetime, timedelta
+from urllib.parse import urlparse
+
+from utils.cache_http import cache, formatear_edad
+from utils.cliente_http import sesion
+from utils.precarga import precargador
+from utils.pronosticos import CachePronosticos, ultima_actualizacion
 
 
 # Register the page (safe to ignore PageError if imported outside app context)
@@ -22,6 +30,23 @@ CITY_OPTIONS = {
     'Nueva York,US': {'lat': 40.7128, 'lon': -74.0060},
     'Tokio,JP': {'lat': 35.6895, 'lon': 139.6917},
 }
+FORECAST_DAYS = [1, 3, 7, 10, 14]
+
+MAX_FORECAST_DAYS = max(FORECAST_DAYS)
+
+FORECAST_URL = os.environ.get('API_CLIMA', 'https://api.open-meteo.com/v1/forecast')
+# Cached copies expire at the next model publication (see utils.pronosticos);
+# past that, serve the old copy while refreshing for up to FORECAST_SWR seconds
+FORECAST_SWR = 2 * 60 * 60
+FORECAST_TIMEOUT = 12
+
+COMPARE_VARIABLES = {
+    'temperature_2m': ('Temperatura', '°C'),
+    'relativehumidity_2m': ('Humedad', '%'),
+    'precipitation': ('Precipitación', 'mm'),
+    'wind_speed_10m': ('Viento', 'm/s'),
+}
+COMPARE_COLORS = ['#d62728', '#1f77b4', '#2ca02c', '#ff7f0e', '#9467bd']
 
 
 layout = html.Div([
@@ -35,14 +60,31 @@ layout = html.Div([
 
         html.Div([
             html.Label('Horizonte (días):'),
-            dcc.Dropdown(id='dropdown-dias-clima', options=[{'label': str(x), 'value': x} for x in [1,3,7,10,14]], value=7, className='input-field'),
+            dcc.Dropdown(id='dropdown-dias-clima', options=[{'label': str(x), 'value': x} for x in FORECAST_DAYS], value=7, className='input-field'),
         ], className='input-group'),
 
         html.Div(className='covid-actions', children=[
             html.Button('Actualizar Clima', id='btn-actualizar-clima', className='btn-generar'),
+            html.Button('Descargar CSV', id='btn-exportar-clima', className='btn-generar'),
+            dcc.Download(id='descarga-clima'),
             html.Div(id='info-actualizado-clima')
         ]),
 
+        html.H3('Comparar ciudades', style={'marginTop': '24px'}),
+
+        html.Div([
+            html.Label('Ciudades:'),
+            dcc.Dropdown(id='dropdown-ciudades-comparacion', options=[{'label': k, 'value': k} for k in CITY_OPTIONS],
+                         value=list(CITY_OPTIONS), multi=True, className='input-field'),
+        ], className='input-group'),
+
+        html.Div([
+            html.Label('Variable:'),
+            dcc.RadioItems(id='radio-variable-clima', options=[{'label': f' {nombre}', 'value': k}
+                                                               for k, (nombre, _) in COMPARE_VARIABLES.items()],
+                           value='temperature_2m', inline=True),
+        ], className='input-group'),
+
     ], className='content left'),
 
     html.Div([
@@ -57,7 +99,12 @@ layout = html.Div([
 
         html.Div(className='covid-graph-container', children=[
             dcc.Graph(id='grafica-clima', style={'height': '470px', 'width': '100%'}, config={'displayModeBar': True}, responsive=True)
-        ])
+        ]),
+
+        html.Div(className='covid-graph-container', children=[
+            dcc.Graph(id='grafica-clima-comparacion', style={'height': '420px', 'width': '100%'}, config={'displayModeBar': True}, responsive=True),
+            html.Div(id='info-clima-comparacion'),
+        ]),
 
     ], className='content right'),
 
@@ -67,18 +114,111 @@ layout = html.Div([
 def fetch_weather(lat, lon, days):
     """Fetch forecast weather using Open-Meteo (no API key required). Returns JSON or None."""
     try:
-        url = (
-            'https://api.open-meteo.com/v1/forecast'
-            f'?latitude={lat}&longitude={lon}'
-            '&hourly=temperature_2m,relativehumidity_2m,precipitation,wind_speed_10m'
-            '&current_weather=true'
-            f'&forecast_days={int(days)}&timezone=auto'
-        )
-        resp = requests.get(url, timeout=12)
-        resp.raise_for_status()
-        return resp.json()
-    except requests.RequestException:
+        return cache.obtener_json(FORECAST_URL, params=_forecast_params(lat, lon, days),
+                                  ttl=_forecast_ttl(), swr=FORECAST_SWR, timeout=FORECAST_TIMEOUT, sesion=sesion)
+    except (requests.RequestException, ValueError):
+        return None
+
+
+def _forecast_ttl():
+    # A copy is fresh only if it was stored after the latest model publication
+    return time.time() - ultima_actualizacion()
+
+
+def _fetch_city(city):
+    opt = CITY_OPTIONS[city]
+    return fetch_weather(opt['lat'], opt['lon'], MAX_FORECAST_DAYS)
+
+
+def _city_age(city):
+    opt = CITY_OPTIONS[city]
+    return cache.edad(FORECAST_URL, _forecast_params(opt['lat'], opt['lon'], MAX_FORECAST_DAYS))
+
+
+# (city, horizon) -> forecast, all horizons sliced from one 14-day download per city;
+# expiry follows the stored copy's age, so a stale copy served while revalidating isn't pinned
+forecasts = CachePronosticos(_fetch_city, horizonte_max=MAX_FORECAST_DAYS, edad=_city_age)
+
+
+def _forecast_params(lat, lon, days):
+    return {
+        'latitude': lat,
+        'longitude': lon,
+        'hourly': 'temperature_2m,relativehumidity_2m,precipitation,wind_speed_10m',
+        'current_weather': 'true',
+        'forecast_days': int(days),
+        'timezone': 'auto',
+    }
+
+
+def fetch_weather_batch(cities, days):
+    """Fetch several cities in one Open-Meteo request (comma-separated coordinates).
+
+    Times come back in GMT so every city shares the same hourly axis. Returns
+    ``{city: data}`` in the order of ``cities``, or None on failure.
+    """
+    cities = [c for c in cities if c in CITY_OPTIONS]
+    if not cities:
+        return None
+    params = _forecast_params(','.join(str(CITY_OPTIONS[c]['lat']) for c in cities),
+                              ','.join(str(CITY_OPTIONS[c]['lon']) for c in cities), days)
+    params['timezone'] = 'GMT'
+    try:
+        data = cache.obtener_json(FORECAST_URL, params=params, ttl=_forecast_ttl(), swr=FORECAST_SWR,
+                                  timeout=FORECAST_TIMEOUT, sesion=sesion)
+    except (requests.RequestException, ValueError):
+        return None
+    data = [data] if isinstance(data, dict) else data
+    if len(data) != len(cities):
+        return None
+    return dict(zip(cities, data))
+
+
+def stack_hourly(batch, variable):
+    """Stack one hourly variable of a batch into a (cities, hours) float array."""
+    first = next(iter(batch.values()))
+    times = np.array(first.get('hourly', {}).get('time', []), dtype='datetime64[m]')
+    rows = [d.get('hourly', {}).get(variable, []) for d in batch.values()]
+    values = np.full((len(rows), times.size), np.nan)
+    for i, row in enumerate(rows):
+        row = np.array(row[:times.size], dtype=float)  # None -> nan
+        values[i, :row.size] = row
+    return times, values
+
+
+HOURLY_VARIABLES = ('temperature_2m', 'precipitation', 'relativehumidity_2m')
+
+
+def hourly_arrays(data):
+    """Hourly series of a forecast as NumPy arrays: ``time`` (datetime64[m]) plus floats.
+
+    Missing values (null) become nan. Returns None when there are no hours or
+    the series are malformed (unparseable times, lengths that don't match).
+    """
+    hourly = data.get('hourly', {})
+    try:
+        arrays = {'time': np.array(hourly.get('time', []), dtype='datetime64[m]')}
+        for variable in HOURLY_VARIABLES:
+            arrays[variable] = np.array(hourly.get(variable, []), dtype=float)
+    except (TypeError, ValueError):
+        return None
+    if not arrays['time'].size or any(a.shape != arrays['time'].shape for a in arrays.values()):
         return None
+    return arrays
+
+
+def hourly_dataframe(data):
+    """Hourly series as a pandas DataFrame, for exports only (pandas is imported here)."""
+    import pandas as pd
+
+    hourly = hourly_arrays(data)
+    return pd.DataFrame(hourly if hourly is not None else {'time': []})
+
+
+# Keep every city's 14-day forecast (all horizons) and the comparison batch warm
+for _city in CITY_OPTIONS:
+    precargador.registrar(f'clima:{_city}', forecasts.obtener, _city, MAX_FORECAST_DAYS)
+precargador.registrar('clima:comparacion', fetch_weather_batch, list(CITY_OPTIONS), MAX_FORECAST_DAYS)
 
 
 def format_number(n, digits=1):
@@ -107,15 +247,17 @@ def format_number(n, digits=1):
     prevent_initial_call=False
 )
 def actualizar_clima(n_clicks, ciudad, dias):
-    info_msg = ''
     opt = CITY_OPTIONS.get(ciudad)
     if not opt:
         fig = go.Figure()
         return 'N/A', 'N/A', 'N/A', 'N/A', fig, 'Ciudad no encontrada.'
 
-    data = fetch_weather(opt['lat'], opt['lon'], dias)
+    data = forecasts.obtener(ciudad, dias)
     if not data:
         fig = go.Figure()
+        if cache.interruptor.abierto(urlparse(FORECAST_URL).netloc):
+            # Breaker open: we failed fast, say so instead of a generic error
+            return 'N/A', 'N/A', 'N/A', 'N/A', fig, 'Servicio de clima no disponible; se reintentará automáticamente.'
         return 'N/A', 'N/A', 'N/A', 'N/A', fig, 'Error al obtener datos del servicio de clima.'
 
     # current weather
@@ -124,27 +266,19 @@ def actualizar_clima(n_clicks, ciudad, dias):
     wind = current.get('windspeed')
 
     # hourly
-    hourly = data.get('hourly', {})
-    times = hourly.get('time', [])
-    temps = hourly.get('temperature_2m', [])
-    precip = hourly.get('precipitation', [])
-    humidity = hourly.get('relativehumidity_2m', [])
+    hourly = hourly_arrays(data)
 
-    # Build dataframe for plotting
-    try:
-        df = pd.DataFrame({'time': times, 'temperature': temps, 'precipitation': precip, 'humidity': humidity})
-        df['time'] = pd.to_datetime(df['time'])
-    except Exception:
-        df = pd.DataFrame()
-
-    # Stats aggregation
-    total_precip = float(df['precipitation'].sum()) if not df.empty else None
-    avg_humidity = float(df['humidity'].mean()) if not df.empty else None
+    # Stats aggregation (nan-aware: Open-Meteo sends null for missing hours)
+    total_precip = avg_humidity = None
+    if hourly is not None:
+        total_precip = float(np.nansum(hourly['precipitation']))
+        if not np.isnan(hourly['relativehumidity_2m']).all():
+            avg_humidity = float(np.nanmean(hourly['relativehumidity_2m']))
 
     # figure
     fig = go.Figure()
-    if not df.empty:
-        fig.add_trace(go.Scatter(x=df['time'], y=df['temperature'], mode='lines', name='Temp (°C)', line=dict(color='red')))
+    if hourly is not None:
+        fig.add_trace(go.Scatter(x=hourly['time'], y=hourly['temperature_2m'], mode='lines', name='Temp (°C)', line=dict(color='red')))
         fig.update_layout(xaxis_title='Fecha', yaxis_title='Temperatura (°C)')
     else:
         fig.add_annotation(text='No hay datos horarios', xref='paper', yref='paper', x=0.5, y=0.5, showarrow=False)
@@ -155,5 +289,74 @@ def actualizar_clima(n_clicks, ciudad, dias):
         format_number(total_precip, 1) + ' mm' if total_precip is not None else 'N/A',
         format_number(avg_humidity, 0) + ' %' if avg_humidity is not None else 'N/A',
         fig,
-        f'Datos actualizados para {ciudad}'
+        _updated_text(ciudad)
     )
+
+
+def _updated_text(ciudad):
+    # Age of the copy this process is showing, not of the shared SQLite row
+    age = formatear_edad(forecasts.edad(ciudad))
+    details = [age] if age else []
+    expires = forecasts.vence(ciudad)
+    if expires is not None and expires > time.time():
+        details.append('próxima actualización ' + time.strftime('%H:%M UTC', time.gmtime(expires)))
+    details.append(f'aciertos de caché {forecasts.tasa_aciertos():.0%}')
+    return f'Datos actualizados para {ciudad} ({", ".join(details)})'
+
+
+@callback(
+    Output('descarga-clima', 'data'),
+    Input('btn-exportar-clima', 'n_clicks'),
+    State('dropdown-ciudad', 'value'),
+    State('dropdown-dias-clima', 'value'),
+    prevent_initial_call=True
+)
+def exportar_clima(n_clicks, ciudad, dias):
+    # Optional export: the only place the page pays for importing pandas
+    data = forecasts.obtener(ciudad, dias) if ciudad in CITY_OPTIONS else None
+    if not data:
+        raise _dash_exceptions.PreventUpdate
+    filename = f"clima_{ciudad.split(',')[0].lower().replace(' ', '_')}_{int(dias)}d.csv"
+    return dcc.send_data_frame(hourly_dataframe(data).to_csv, filename, index=False)
+
+
+@callback(
+    Output('grafica-clima-comparacion', 'figure'),
+    Output('info-clima-comparacion', 'children'),
+    Input('btn-actualizar-clima', 'n_clicks'),
+    Input('dropdown-ciudades-comparacion', 'value'),
+    Input('radio-variable-clima', 'value'),
+    State('dropdown-dias-clima', 'value'),
+    prevent_initial_call=False
+)
+def comparar_ciudades(n_clicks, ciudades, variable, dias):
+    ciudades = [c for c in (ciudades or []) if c in CITY_OPTIONS]
+    if not ciudades:
+        return go.Figure(), 'Seleccione al menos una ciudad.'
+
+    # One upstream request for all selected cities; the horizon is a slice of the 14-day batch
+    batch = fetch_weather_batch(ciudades, MAX_FORECAST_DAYS)
+    if not batch:
+        return go.Figure(), 'Error al obtener datos del servicio de clima.'
+
+    times, values = stack_hourly(batch, variable)
+    hours = int(dias or 7) * 24
+    times, values = times[:hours], values[:, :hours]
+    nombre, unidad = COMPARE_VARIABLES[variable]
+
+    fig = go.Figure()
+    for i, ciudad in enumerate(ciudades):
+        fig.add_trace(go.Scatter(
+            x=times, y=values[i], mode='lines', name=ciudad,
+            line=dict(color=COMPARE_COLORS[i % len(COMPARE_COLORS)], width=2),
+            hovertemplate=f'{ciudad}<br>%{{x|%Y-%m-%d %H:%M}} UTC<br>{nombre}: %{{y:.1f}} {unidad}<extra></extra>'
+        ))
+    fig.update_layout(title={'text': f'{nombre} por ciudad (UTC)', 'x': 0.05}, xaxis_title='Fecha',
+                      yaxis_title=f'{nombre} ({unidad})',
+                      legend=dict(orientation='h', yanchor='bottom', y=1.0, xanchor='center', x=0.5))
+
+    # Per-city summary straight from the stacked array
+    with np.errstate(all='ignore'):
+        medias = np.nanmean(values, axis=1)
+    resumen = ', '.join(f'{c}: {m:.1f} {unidad}' for c, m in zip(ciudades, medias))
+    return fig, f'Promedio {nombre.lower()} ({len(ciudades)} ciudades, {times.size} h): {resumen}'
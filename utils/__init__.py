@@ -0,0 +1 @@
+"""Funciones auxiliares compartidas por las páginas de la app."""
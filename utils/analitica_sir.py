@@ -0,0 +1,84 @@
+"""Métricas del modelo SIR en forma cerrada, sin integrar la curva completa."""
+import numpy as np
+from scipy.integrate import solve_ivp
+from scipy.special import lambertw
+
+from utils.compartimentos import SIR
+
+
+def numero_reproductivo(beta, gamma):
+    return beta / gamma
+
+
+def umbral_inmunidad(R0):
+    """Fracción de la población que debe ser inmune para que I deje de crecer."""
+    return max(0.0, 1.0 - 1.0 / R0) if R0 > 0 else 0.0
+
+
+def tamano_final(R0, N, I0, R_inicial=0.0):
+    """Fracción de susceptibles al final de la epidemia y tamaño final (personas).
+
+    Resuelve ``s_inf = s0 * exp(-R0 * (1 - r0 - s_inf))`` con la rama principal
+    de la función W de Lambert:
+    ``s_inf = -W(-R0 * s0 * exp(-R0 * (1 - r0))) / R0``.
+    """
+    s0 = (N - I0 - R_inicial) / N
+    r0 = R_inicial / N
+    if R0 <= 0:
+        return s0, 0.0
+    s_inf = float(np.real(-lambertw(-R0 * s0 * np.exp(-R0 * (1 - r0)), 0) / R0))
+    return s_inf, (s0 - s_inf) * N
+
+
+def pico_infectados(R0, N, I0, R_inicial=0.0):
+    """Máximo de I usando la integral primera ``I + S - (N / R0) ln S = cte``."""
+    S0 = N - I0 - R_inicial
+    if R0 * S0 / N <= 1:
+        return float(I0)
+    return float(I0 + S0 - N / R0 * (1 + np.log(R0 * S0 / N)))
+
+
+def dia_pico(beta, gamma, N, I0, t_max=3650.0):
+    """Instante exacto del pico: evento ``S = N / R0`` (dI/dt = 0) con ``solve_ivp``.
+
+    Devuelve ``(t_pico, I_pico)`` o ``(0, I0)`` si I nunca crece.
+    """
+    R0 = numero_reproductivo(beta, gamma)
+    S0 = N - I0
+    if R0 * S0 / N <= 1:
+        return 0.0, float(I0)
+
+    def evento(t, y, *args):
+        return y[0] - N / R0
+    evento.terminal = True
+    evento.direction = -1
+
+    sol = solve_ivp(lambda t, y, *args: SIR.rhs(y, t, *args), (0.0, t_max), [S0, I0, 0.0],
+                    args=(beta, gamma, N), events=evento, method='LSODA',
+                    jac=lambda t, y, *args: SIR.jacobiano(y, t, *args), rtol=1e-10, atol=1e-8)
+    if not sol.t_events[0].size:
+        return float('nan'), float('nan')
+    return float(sol.t_events[0][0]), float(sol.y_events[0][0][1])
+
+
+def resumen(beta, gamma, N, I0):
+    """Todas las métricas del panel; solo ``dia_pico`` requiere integrar.
+
+    ``ataque`` es la fracción de la población que se infecta durante la
+    epidemia (sin contar los ``I0`` iniciales), igual que ``casos_totales``.
+    Lanza ``ValueError`` si no se cumple ``0 < I0 <= N``.
+    """
+    if not 0 < I0 <= N:
+        raise ValueError("resumen: se requiere 0 < I0 <= N")
+    R0 = numero_reproductivo(beta, gamma)
+    _, total = tamano_final(R0, N, I0)
+    t_pico, I_pico = dia_pico(beta, gamma, N, I0)
+    return {
+        'R0': R0,
+        'umbral': umbral_inmunidad(R0),
+        'ataque': total / N,
+        'casos_totales': total,
+        'pico': pico_infectados(R0, N, I0),
+        'dia_pico': t_pico,
+        'pico_evento': I_pico,
+    }
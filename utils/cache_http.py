@@ -0,0 +1,249 @@
+"""Caché persistente de respuestas HTTP (JSON) compartida entre procesos.
+
+Las respuestas se guardan en SQLite, así que todos los workers del servidor
+(gunicorn, etc.) comparten la misma caché y los mismos contadores. Cada
+entrada tiene un TTL; vencido el TTL se revalida con ``If-None-Match`` /
+``If-Modified-Since`` y, dentro de la ventana ``swr`` (stale-while-revalidate),
+se responde de inmediato con la copia vieja mientras se revalida en segundo
+plano. Si el servidor falla y hay una copia guardada, se usa esa copia.
+
+Cada descarga pasa por el interruptor del host (``utils.cliente_http``): con
+el interruptor abierto no se espera el timeout, se devuelve la copia guardada
+o se lanza ``CircuitoAbierto`` (una ``requests.RequestException``) al instante.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlencode, urlparse
+
+import requests
+
+from utils.cliente_http import UnSoloVuelo, interruptor
+
+RUTA_POR_DEFECTO = os.environ.get(
+    'CACHE_HTTP_DB',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache', 'http.sqlite3'),
+)
+
+# Conexiones SQLite que cada proceso mantiene abiertas entre peticiones
+MAX_CONEXIONES_LIBRES = 8
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS respuestas (
+    clave TEXT PRIMARY KEY,
+    cuerpo TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    guardado REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS contadores (
+    nombre TEXT PRIMARY KEY,
+    valor INTEGER NOT NULL
+);
+"""
+
+
+class CacheHTTP:
+    def __init__(self, ruta=RUTA_POR_DEFECTO, interruptor=interruptor):
+        self.ruta = ruta
+        self.interruptor = interruptor
+        self._libres = []
+        self._cerrojo_conexiones = threading.Lock()
+        self._pid = os.getpid()
+        self._heredadas = []
+        if ruta != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        with self._conectar() as conexion:
+            # WAL queda guardado en el archivo: lectores y escritores no se bloquean
+            conexion.execute('PRAGMA journal_mode=WAL')
+            conexion.executescript(_ESQUEMA)
+        self._revalidando = set()
+        self._vuelos = UnSoloVuelo()
+        self._cerrojo = threading.Lock()
+
+    def _abrir(self):
+        conexion = sqlite3.connect(self.ruta, timeout=10, check_same_thread=False)
+        conexion.execute('PRAGMA synchronous=NORMAL')
+        return conexion
+
+    @contextmanager
+    def _conectar(self):
+        # Pool acotado: cada hilo toma una conexión libre (o abre una) y la
+        # devuelve al terminar; se guardan a lo sumo MAX_CONEXIONES_LIBRES, así
+        # los hilos de corta vida no acumulan conexiones ni descriptores
+        with self._cerrojo_conexiones:
+            if self._pid != os.getpid():
+                # Heredadas por fork: no se usan ni se cierran en el hijo
+                # (cerrarlas podría hacer checkpoint y borrar el WAL del padre)
+                self._heredadas.extend(self._libres)
+                self._libres, self._pid = [], os.getpid()
+            conexion = self._libres.pop() if self._libres else None
+        if conexion is None:
+            conexion = self._abrir()
+        try:
+            with conexion:
+                yield conexion
+        finally:
+            with self._cerrojo_conexiones:
+                devolver = self._pid == os.getpid() and len(self._libres) < MAX_CONEXIONES_LIBRES
+                if devolver:
+                    self._libres.append(conexion)
+            if not devolver:
+                conexion.close()
+
+    # ---------- contadores ----------
+    def _contar(self, nombre):
+        with self._conectar() as conexion:
+            conexion.execute(
+                'INSERT INTO contadores (nombre, valor) VALUES (?, 1) '
+                'ON CONFLICT(nombre) DO UPDATE SET valor = valor + 1', (nombre,))
+
+    def estadisticas(self):
+        """Contadores acumulados: hit, miss, stale, revalidado (304), error...
+
+        ``compartidas`` (misses que esperaron la descarga de otro hilo) es de este proceso.
+        """
+        with self._conectar() as conexion:
+            contadores = dict(conexion.execute('SELECT nombre, valor FROM contadores').fetchall())
+        contadores['compartidas'] = self._vuelos.compartidas
+        return contadores
+
+    def edad(self, url, params=None):
+        """Segundos desde que se descargó (o revalidó) la copia guardada, o ``None``."""
+        entrada = self._leer(_clave(url, params))
+        return None if entrada is None else time.time() - entrada[3]
+
+    def limpiar(self):
+        with self._conectar() as conexion:
+            conexion.execute('DELETE FROM respuestas')
+            conexion.execute('DELETE FROM contadores')
+
+    # ---------- almacenamiento ----------
+    def _leer(self, clave):
+        with self._conectar() as conexion:
+            return conexion.execute(
+                'SELECT cuerpo, etag, last_modified, guardado FROM respuestas WHERE clave = ?',
+                (clave,)).fetchone()
+
+    def _guardar(self, clave, cuerpo, etag, last_modified):
+        with self._conectar() as conexion:
+            conexion.execute(
+                'INSERT OR REPLACE INTO respuestas (clave, cuerpo, etag, last_modified, guardado) '
+                'VALUES (?, ?, ?, ?, ?)', (clave, cuerpo, etag, last_modified, time.time()))
+
+    def _refrescar(self, clave):
+        with self._conectar() as conexion:
+            conexion.execute('UPDATE respuestas SET guardado = ? WHERE clave = ?', (time.time(), clave))
+
+    # ---------- red ----------
+    def _descargar(self, clave, url, params, timeout, entrada, sesion):
+        """GET condicional. Devuelve el cuerpo vigente (texto) o lanza RequestException."""
+        cabeceras = {}
+        if entrada is not None:
+            if entrada[1]:
+                cabeceras['If-None-Match'] = entrada[1]
+            if entrada[2]:
+                cabeceras['If-Modified-Since'] = entrada[2]
+        host = urlparse(url).netloc
+        self.interruptor.antes(host)
+        try:
+            respuesta = sesion.get(url, params=params, headers=cabeceras, timeout=timeout)
+        except Exception:
+            self.interruptor.fallo(host)
+            raise
+        except BaseException:
+            # KeyboardInterrupt, SystemExit...: no dicen nada del host
+            self.interruptor.liberar(host)
+            raise
+        if respuesta.status_code >= 500:
+            self.interruptor.fallo(host)
+        else:
+            self.interruptor.exito(host)
+        if respuesta.status_code == 304 and entrada is not None:
+            self._refrescar(clave)
+            self._contar('revalidado')
+            return entrada[0]
+        respuesta.raise_for_status()
+        self._guardar(clave, respuesta.text, respuesta.headers.get('ETag'),
+                      respuesta.headers.get('Last-Modified'))
+        return respuesta.text
+
+    def _descargar_miss(self, clave, url, params, timeout, entrada, sesion):
+        # Otro hilo o proceso pudo guardar una copia nueva entre la lectura y este punto
+        actual = self._leer(clave)
+        if actual is not None and (entrada is None or actual[3] > entrada[3]):
+            self._contar('hit')
+            return actual[0]
+        self._contar('miss')
+        return self._descargar(clave, url, params, timeout, entrada, sesion)
+
+    def _revalidar_en_segundo_plano(self, clave, url, params, timeout, entrada, sesion):
+        with self._cerrojo:
+            if clave in self._revalidando:
+                return
+            self._revalidando.add(clave)
+
+        def tarea():
+            try:
+                self._descargar(clave, url, params, timeout, entrada, sesion)
+            except requests.RequestException:
+                self._contar('error')
+            finally:
+                with self._cerrojo:
+                    self._revalidando.discard(clave)
+
+        threading.Thread(target=tarea, daemon=True).start()
+
+    def obtener_json(self, url, params=None, ttl=300, swr=0, timeout=10, sesion=requests):
+        """GET con caché; devuelve el JSON decodificado.
+
+        - Copia con menos de ``ttl`` segundos: se devuelve sin red (``hit``).
+        - Copia con menos de ``ttl + swr``: se devuelve y se revalida en
+          segundo plano (``stale``).
+        - Sin copia o más vieja: GET condicional síncrono (``miss``); si falla
+          y existe una copia, se devuelve esa (``stale_error``). Los hilos que
+          piden la misma URL mientras tanto esperan esa misma descarga.
+        Lanza ``requests.RequestException`` si falla y no hay copia.
+        """
+        clave = _clave(url, params)
+        entrada = self._leer(clave)
+        if entrada is not None:
+            edad = time.time() - entrada[3]
+            if edad < ttl:
+                self._contar('hit')
+                return json.loads(entrada[0])
+            if edad < ttl + swr:
+                self._contar('stale')
+                self._revalidar_en_segundo_plano(clave, url, params, timeout, entrada, sesion)
+                return json.loads(entrada[0])
+
+        # Misses simultáneos de la misma clave comparten una sola descarga
+        try:
+            cuerpo = self._vuelos.ejecutar(clave, self._descargar_miss, clave, url, params, timeout, entrada, sesion)
+            return json.loads(cuerpo)
+        except requests.RequestException:
+            if entrada is None:
+                raise
+            self._contar('stale_error')
+            return json.loads(entrada[0])
+
+
+def _clave(url, params):
+    return url + ('?' + urlencode(sorted(params.items())) if params else '')
+
+
+def formatear_edad(segundos):
+    """``'hace 42 s'``, ``'hace 5 min'``, ``'hace 3 h'``; vacío si no se conoce."""
+    if segundos is None:
+        return ''
+    if segundos < 60:
+        return f"hace {int(segundos)} s"
+    if segundos < 3600:
+        return f"hace {int(segundos // 60)} min"
+    return f"hace {segundos / 3600:.0f} h"
+
+
+cache = CacheHTTP()
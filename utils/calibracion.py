@@ -0,0 +1,166 @@
+"""Ajuste de parámetros SIR/SEIR a series históricas de casos acumulados.
+
+La optimización usa ``differential_evolution`` en modo vectorizado: en cada
+iteración toda la población de candidatos se integra como un único lote con
+``ModeloCompartimental.simular_lote``, en lugar de una llamada a ``odeint``
+por evaluación de la función objetivo.
+"""
+import base64
+import csv
+import io
+import json
+import time
+
+import numpy as np
+from scipy.optimize import differential_evolution
+
+from utils.compartimentos import SIR, SEIR
+from utils.historico import parsear_fechas
+
+# Rangos de búsqueda por parámetro (1/días)
+LIMITES = {'beta': (0.01, 2.0), 'sigma': (0.05, 1.0), 'gamma': (0.01, 1.0)}
+
+
+def serie_desde_timeline(casos):
+    """Convierte ``{'m/d/yy': valor}`` (formato de disease.sh) en (fechas, valores)."""
+    fechas = parsear_fechas(casos.keys())
+    valores = np.fromiter(casos.values(), dtype=float, count=len(casos))
+    orden = np.argsort(fechas)
+    return fechas[orden], valores[orden]
+
+
+def cargar_serie(contenido, nombre_archivo=''):
+    """Lee una serie de casos acumulados desde un snapshot local (JSON o CSV).
+
+    JSON: la respuesta de ``/historical/{pais}`` (con ``timeline``), solo el
+    ``timeline`` o directamente ``{fecha: casos}``. CSV: columnas ``fecha`` y
+    ``casos`` (también se aceptan ``date`` y ``cases``).
+    """
+    if isinstance(contenido, bytes):
+        contenido = contenido.decode('utf-8')
+    if nombre_archivo.lower().endswith('.csv') or not contenido.lstrip().startswith(('{', '[')):
+        lector = csv.DictReader(io.StringIO(contenido))
+        casos = {}
+        for fila in lector:
+            fecha = fila.get('fecha') or fila.get('date')
+            valor = fila.get('casos') or fila.get('cases')
+            if fecha and valor not in (None, ''):
+                casos[fecha] = float(valor)
+        return _validar(*serie_desde_timeline(casos))
+
+    datos = json.loads(contenido)
+    if isinstance(datos, dict):
+        datos = datos.get('timeline', datos)
+    if isinstance(datos, dict):
+        datos = datos.get('cases', datos)
+    if not isinstance(datos, dict):
+        raise ValueError("el JSON debe ser un objeto {fecha: casos}, con 'timeline' o 'cases'")
+    return _validar(*serie_desde_timeline(datos))
+
+
+def _validar(fechas, valores):
+    if not np.isfinite(valores).all():
+        raise ValueError('la serie tiene casos vacíos o no numéricos')
+    return fechas, valores
+
+
+def decodificar_upload(contents):
+    """Decodifica el ``contents`` (data URL en base64) de ``dcc.Upload``."""
+    _, datos = contents.split(',', 1)
+    return base64.b64decode(datos)
+
+
+def estado_inicial(casos, inicio, gamma, sigma=None, memoria=60):
+    """Compartimentos al comienzo de la ventana, a partir de los incrementos previos.
+
+    ``casos`` es la serie acumulada completa e ``inicio`` el índice del primer
+    día ajustado. Los infecciosos son los casos de los días previos que siguen
+    en ``I`` (cada día sale una fracción ``gamma``), los expuestos los que
+    aparecerán al ritmo de la incidencia reciente (``incidencia / sigma``) y el
+    resto del acumulado ya se recuperó. ``gamma``/``sigma`` pueden ser arreglos
+    ``(m,)`` (un estado por candidato). Sin días previos se supone que la serie
+    empieza con el brote: todo el acumulado está infeccioso.
+    """
+    base = casos[inicio]
+    previos = np.maximum(np.diff(casos[max(inicio - memoria, 0):inicio + 1]), 0.0)[::-1]  # el más reciente primero
+    if not previos.size:
+        return {'I': max(base, 1.0)}
+    gamma = np.asarray(gamma, dtype=float)
+    pesos = np.exp(-np.multiply.outer(np.arange(previos.size) + 0.5, gamma))  # a mitad de cada día
+    infecciosos = np.clip(np.tensordot(previos, pesos, axes=1), 1.0, max(base, 1.0))
+    iniciales = {'I': infecciosos, 'R': np.maximum(base - infecciosos, 0.0)}
+    if sigma is not None:
+        # Flujo E -> I en el instante inicial: parábola en log de los
+        # incrementos de las últimas dos semanas (cada uno en la mitad de su
+        # día), evaluada hoy; así se sigue el crecimiento aunque se frene
+        dias = previos[:14]
+        positivos = dias > 0
+        flujo = previos[0]
+        if positivos.sum() >= 3:
+            x = -(np.arange(dias.size) + 0.5)[positivos]
+            grado = 2 if positivos.sum() >= 7 else 1
+            flujo = float(np.exp(np.polyval(np.polyfit(x, np.log(dias[positivos]), grado), 0.0)))
+        iniciales['E'] = flujo / np.asarray(sigma, dtype=float)
+    return iniciales
+
+
+def ajustar(casos, N, modelo='SEIR', semilla=0, max_iter=60, tam_poblacion=12, ventana=None):
+    """Ajusta las tasas de ``modelo`` a los últimos ``ventana`` días de ``casos`` acumulados.
+
+    ``casos`` es la serie completa: los días anteriores a la ventana no se
+    ajustan, pero fijan el estado inicial (``estado_inicial``), así una ventana
+    a mitad de la epidemia no arranca con todo el acumulado como infecciosos.
+    El acumulado del modelo es ``N - S`` (SIR) o ``N - S - E`` (SEIR). El error
+    se mide sobre ``log1p`` para que el inicio exponencial pese tanto como la
+    meseta. Devuelve un dict con los parámetros, la curva ajustada (solo la
+    ventana), el tiempo total y el número de llamadas al integrador.
+    """
+    modelo = {'SIR': SIR, 'SEIR': SEIR}[modelo]
+    casos = np.asarray(casos, dtype=float)
+    inicio = 0 if ventana is None else max(casos.size - int(ventana), 0)
+    observados = casos[inicio:]
+    t = np.arange(observados.size, dtype=float)
+    nombres = [p for p in modelo.parametros if p != 'N']
+    limites = [LIMITES[p] for p in nombres]
+    base = observados[0]
+    objetivo_log = np.log1p(observados)
+    contador = {'llamadas': 0, 'escenarios': 0}
+
+    def simular(params):
+        # El estado inicial depende de gamma (y sigma): uno por candidato
+        iniciales = estado_inicial(casos, inicio, params['gamma'], params.get('sigma'))
+        sol = modelo.simular_lote(dict(params, N=N), t, iniciales, paso_max=1.0, registrar=_registrar(modelo))
+        # sol: (len(t), n_registrados, m) con S (y E) registrados; el desfase
+        # corrige el acumulado inicial si se acotaron los infecciosos
+        return N - sol.sum(axis=1) + base - (iniciales['I'] + iniciales.get('R', 0.0))
+
+    def costo(candidatos):
+        # candidatos: (n_parametros, m) -> costo (m,) con una sola integración por lote
+        candidatos = np.atleast_2d(candidatos)
+        acumulado = simular({p: candidatos[i] for i, p in enumerate(nombres)})
+        contador['llamadas'] += 1
+        contador['escenarios'] += candidatos.shape[1]
+        with np.errstate(invalid='ignore'):
+            error = np.mean((np.log1p(np.maximum(acumulado, 0.0)) - objetivo_log[:, None]) ** 2, axis=0)
+        return np.where(np.isfinite(error), error, np.inf)
+
+    inicio_reloj = time.perf_counter()
+    resultado = differential_evolution(costo, limites, vectorized=True, updating='deferred',
+                                       seed=semilla, maxiter=max_iter, popsize=tam_poblacion,
+                                       tol=1e-6, polish=False)
+    mejores = {p: float(v) for p, v in zip(nombres, resultado.x)}
+    curva = simular(mejores)
+    duracion = time.perf_counter() - inicio_reloj
+
+    return {
+        'parametros': mejores,
+        'curva': np.ravel(curva),
+        'error': float(resultado.fun),
+        'segundos': duracion,
+        'llamadas_integrador': contador['llamadas'] + 1,
+        'escenarios': contador['escenarios'] + 1,
+    }
+
+
+def _registrar(modelo):
+    return ('S', 'E') if 'E' in modelo.compartimentos else ('S',)
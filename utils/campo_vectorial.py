@@ -0,0 +1,160 @@
+"""Renderizado vectorizado de campos vectoriales 2D con Plotly."""
+from functools import lru_cache
+
+import numpy as np
+import plotly.graph_objects as go
+
+from utils.expresiones import compilar, normalizar
+
+
+def segmentos_quiver(X, Y, U, V):
+    """Construye los arreglos x/y de todos los segmentos separados por NaN.
+
+    Cada flecha ocupa tres posiciones: inicio, fin y NaN (corte de línea).
+    """
+    x0 = np.ravel(X).astype(float)
+    y0 = np.ravel(Y).astype(float)
+    x1 = x0 + np.ravel(U)
+    y1 = y0 + np.ravel(V)
+
+    xs = np.empty(3 * x0.size)
+    ys = np.empty(3 * y0.size)
+    xs[0::3], xs[1::3], xs[2::3] = x0, x1, np.nan
+    ys[0::3], ys[1::3], ys[2::3] = y0, y1, np.nan
+    return xs, ys
+
+
+def trazas_quiver(X, Y, U, V, color_linea='blue', color_punta='red', escala=1.0):
+    """Devuelve dos trazas: una con todos los segmentos y otra con las puntas.
+
+    Las puntas usan el símbolo 'arrow' de Plotly rotado según la dirección del
+    vector, y conservan el hover por punto mediante ``customdata``. ``escala``
+    solo afecta la longitud dibujada; el hover muestra el vector real.
+    """
+    # Expresiones constantes (p. ej. "1") devuelven escalares: se expanden a la malla
+    U = np.broadcast_to(U, np.shape(X)).astype(float).ravel()
+    V = np.broadcast_to(V, np.shape(X)).astype(float).ravel()
+    x0 = np.ravel(X).astype(float)
+    y0 = np.ravel(Y).astype(float)
+    xs, ys = segmentos_quiver(x0, y0, U * escala, V * escala)
+
+    # Plotly mide el ángulo en grados, en sentido horario desde el eje +y
+    angulo = 90.0 - np.degrees(np.arctan2(V, U))
+
+    lineas = go.Scatter(
+        x=xs, y=ys,
+        mode='lines',
+        line=dict(color=color_linea, width=2),
+        hoverinfo='skip',
+        showlegend=False,
+    )
+    puntas = go.Scatter(
+        x=x0 + U * escala, y=y0 + V * escala,
+        mode='markers',
+        marker=dict(symbol='arrow', size=8, angle=angulo, color=color_punta),
+        customdata=np.column_stack([x0, y0, U, V]),
+        hovertemplate="Punto: (%{customdata[0]:.1f}, %{customdata[1]:.1f})"
+                      "<br>Vector: (%{customdata[2]:.2f}, %{customdata[3]:.2f})<extra></extra>",
+        showlegend=False,
+    )
+    return [lineas, puntas]
+
+
+# ---------------- Nivel de detalle según la ventana visible ----------------
+
+# Máximo de flechas visibles, sin importar el nivel de zoom
+PRESUPUESTO_FLECHAS = 2500
+TAMANO_CACHE_TESELAS = 512
+# La vista completa muestra el dominio [-xmax, xmax] en un rango 10 % mayor
+MARGEN_VISTA = 1.1
+
+
+def flechas_por_eje(n):
+    """Flechas por eje de la vista completa: ``n`` acotado por ``PRESUPUESTO_FLECHAS``.
+
+    Con zoom se mantiene la misma densidad en pantalla, pero la ventana se
+    llena entera (sin el margen de la vista completa): hasta ``MARGEN_VISTA``
+    veces más flechas por eje, que también deben caber en el presupuesto.
+    """
+    return int(max(2, min(n, np.sqrt(PRESUPUESTO_FLECHAS) / MARGEN_VISTA)))
+
+
+def ventana_desde_relayout(relayout, xmax, ymax):
+    """Extrae ``(x0, x1, y0, y1)`` de ``relayoutData``; None si no hay zoom activo."""
+    if not relayout or relayout.get('xaxis.autorange') or relayout.get('yaxis.autorange'):
+        return None
+
+    def rango(eje):
+        if f'{eje}.range[0]' in relayout:
+            return float(relayout[f'{eje}.range[0]']), float(relayout[f'{eje}.range[1]'])
+        if f'{eje}.range' in relayout:
+            return tuple(float(v) for v in relayout[f'{eje}.range'])
+        return None
+
+    rx, ry = rango('xaxis'), rango('yaxis')
+    if rx is None and ry is None:
+        return None
+    rx = rx or (-xmax * 1.1, xmax * 1.1)
+    ry = ry or (-ymax * 1.1, ymax * 1.1)
+    return min(rx), max(rx), min(ry), max(ry)
+
+
+def _nivel(ancho_total, ancho_visible):
+    """Menor nivel de zoom cuya tesela no es más ancha que la ventana.
+
+    Puede ser negativo al alejar el zoom más allá del dominio original.
+    """
+    if ancho_visible <= 0:
+        return 0
+    return int(np.ceil(np.log2(ancho_total / ancho_visible)))
+
+
+@lru_cache(maxsize=TAMANO_CACHE_TESELAS)
+def _tesela(fx_clave, fy_clave, xmax, ymax, kx, ky, nivel_x, nivel_y, ix, iy):
+    # Muestras centradas en celdas: las teselas vecinas no repiten puntos en el borde
+    ancho_x = 2 * xmax / 2 ** nivel_x
+    ancho_y = 2 * ymax / 2 ** nivel_y
+    xs = -xmax + ancho_x * (ix + (np.arange(kx) + 0.5) / kx)
+    ys = -ymax + ancho_y * (iy + (np.arange(ky) + 0.5) / ky)
+    X, Y = np.meshgrid(xs, ys)
+    U = compilar(fx_clave)(X, Y)
+    V = compilar(fy_clave)(X, Y)
+    resultado = tuple(np.array(a).ravel() for a in (X, Y, U, V))
+    for arreglo in resultado:
+        arreglo.flags.writeable = False
+    return resultado
+
+
+def campo_en_ventana(fx_str, fy_str, xmax, ymax, n, ventana):
+    """Evalúa el campo solo en las teselas que cubren ``ventana``.
+
+    El ancho de las teselas sigue el zoom y sus muestras por eje se eligen
+    para que la ventana tenga la misma densidad en pantalla que la vista
+    completa (``flechas_por_eje(n)`` flechas en ``2 * xmax``), así que la
+    cantidad de flechas visibles no cambia con el zoom y nunca supera
+    ``PRESUPUESTO_FLECHAS``. Las teselas ya calculadas se sirven desde la
+    caché, así que volver a una zona visitada con el mismo zoom no reevalúa nada.
+    """
+    x0, x1, y0, y1 = ventana
+    m = flechas_por_eje(n)
+    fx_clave, fy_clave = normalizar(fx_str), normalizar(fy_str)
+    nivel_x = _nivel(2 * xmax, x1 - x0)
+    nivel_y = _nivel(2 * ymax, y1 - y0)
+    ancho_x = 2 * xmax / 2 ** nivel_x
+    ancho_y = 2 * ymax / 2 ** nivel_y
+    # La tesela mide entre media y una ventana: m * MARGEN_VISTA flechas por ventana
+    kx = max(1, int(round(m * MARGEN_VISTA * ancho_x / (x1 - x0))))
+    ky = max(1, int(round(m * MARGEN_VISTA * ancho_y / (y1 - y0))))
+
+    ix_rango = range(int(np.floor((x0 + xmax) / ancho_x)), int(np.floor((x1 + xmax) / ancho_x)) + 1)
+    iy_rango = range(int(np.floor((y0 + ymax) / ancho_y)), int(np.floor((y1 + ymax) / ancho_y)) + 1)
+    teselas = [_tesela(fx_clave, fy_clave, float(xmax), float(ymax), kx, ky, nivel_x, nivel_y, ix, iy)
+               for ix in ix_rango for iy in iy_rango]
+    X, Y, U, V = (np.concatenate(partes) for partes in zip(*teselas))
+
+    visible = (X >= x0) & (X <= x1) & (Y >= y0) & (Y <= y1)
+    return X[visible], Y[visible], U[visible], V[visible]
+
+
+def info_cache_teselas():
+    return _tesela.cache_info()
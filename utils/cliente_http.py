@@ -0,0 +1,167 @@
+"""Sesión HTTP compartida con conexiones persistentes y un pool de hilos.
+
+Todas las páginas usan la misma ``requests.Session``: las conexiones TCP/TLS
+se reutilizan entre peticiones (keep-alive) y cada host tiene como máximo
+``MAX_CONEXIONES_POR_HOST`` conexiones abiertas a la vez; si se piden más, la
+petición espera a que se libere una en lugar de abrir otra. ``en_paralelo``
+lanza varias llamadas bloqueantes a la vez sobre un pool de hilos común,
+``UnSoloVuelo`` agrupa llamadas idénticas simultáneas en una sola e
+``interruptor`` corta rápido las peticiones a un host que está fallando.
+"""
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+MAX_CONEXIONES_POR_HOST = int(os.environ.get('HTTP_CONEXIONES_POR_HOST', 4))
+MAX_HOSTS = 10
+MAX_HILOS = int(os.environ.get('HTTP_HILOS', 8))
+
+
+def crear_sesion(max_por_host=MAX_CONEXIONES_POR_HOST, max_hosts=MAX_HOSTS):
+    """``requests.Session`` cuyo pool limita las conexiones simultáneas por host."""
+    sesion = requests.Session()
+    adaptador = HTTPAdapter(pool_connections=max_hosts, pool_maxsize=max_por_host, pool_block=True)
+    sesion.mount('http://', adaptador)
+    sesion.mount('https://', adaptador)
+    return sesion
+
+
+sesion = crear_sesion()
+_ejecutor = ThreadPoolExecutor(max_workers=MAX_HILOS, thread_name_prefix='http')
+
+
+def en_paralelo(*llamadas):
+    """Ejecuta ``(funcion, *args)`` a la vez y devuelve los resultados en orden.
+
+    ``en_paralelo((obtener_a, x), (obtener_b, y))`` tarda lo que la más lenta,
+    no la suma de ambas. Las excepciones se propagan al llamador.
+    """
+    futuros = [_ejecutor.submit(funcion, *args) for funcion, *args in llamadas]
+    return [futuro.result() for futuro in futuros]
+
+
+class UnSoloVuelo:
+    """Agrupa llamadas simultáneas con la misma clave (*single-flight*).
+
+    El primer hilo que llega con una clave ejecuta la función; los que llegan
+    mientras sigue en curso esperan y reciben el mismo resultado (o la misma
+    excepción). Terminada la llamada, la clave se libera: la siguiente vuelve
+    a ejecutar la función.
+    """
+
+    def __init__(self):
+        self._en_curso = {}
+        self._cerrojo = threading.Lock()
+        self.ejecutadas = 0
+        self.compartidas = 0
+
+    def ejecutar(self, clave, funcion, *args):
+        with self._cerrojo:
+            futuro = self._en_curso.get(clave)
+            lider = futuro is None
+            if lider:
+                futuro = self._en_curso[clave] = Future()
+                self.ejecutadas += 1
+            else:
+                self.compartidas += 1
+        if not lider:
+            return futuro.result()
+        try:
+            futuro.set_result(funcion(*args))
+        except BaseException as e:
+            futuro.set_exception(e)
+        finally:
+            with self._cerrojo:
+                del self._en_curso[clave]
+        return futuro.result()
+
+    def estadisticas(self):
+        return {'ejecutadas': self.ejecutadas, 'compartidas': self.compartidas}
+
+
+class CircuitoAbierto(requests.ConnectionError):
+    """El interruptor del host está abierto: no se intenta la petición."""
+
+
+class InterruptorCircuito:
+    """Interruptor (*circuit breaker*) por host.
+
+    Tras ``umbral`` fallos seguidos (error de red, timeout o respuesta 5xx) el
+    host queda *abierto* durante ``espera`` segundos y las peticiones fallan al
+    instante con :class:`CircuitoAbierto`. Pasado ese tiempo queda
+    *semiabierto*: una sola petición de prueba pasa y las demás siguen fallando
+    al instante mientras está en curso; si responde se cierra, si falla vuelve
+    a abrirse. ``aperturas`` cuenta cuántas veces se abrió.
+    """
+
+    def __init__(self, umbral=3, espera=30.0):
+        self.umbral = umbral
+        self.espera = espera
+        self._hosts = {}
+        self._cerrojo = threading.Lock()
+
+    def _host(self, host):
+        return self._hosts.setdefault(host, {'estado': 'cerrado', 'fallos': 0, 'aperturas': 0,
+                                             'abierto_desde': 0.0, 'sondeando': False})
+
+    def antes(self, host):
+        """Lanza :class:`CircuitoAbierto` si la petición a ``host`` no debe hacerse.
+
+        Mientras la petición de prueba está en curso, las demás fallan al
+        instante (y ``CacheHTTP`` responde con su copia) en lugar de esperarla.
+        """
+        with self._cerrojo:
+            h = self._host(host)
+            if h['estado'] == 'abierto':
+                restante = h['abierto_desde'] + self.espera - time.monotonic()
+                if restante > 0:
+                    raise CircuitoAbierto(f"{host}: servicio no disponible, reintento en {restante:.0f} s")
+                h['estado'] = 'semiabierto'
+            if h['estado'] == 'semiabierto':
+                if h['sondeando']:
+                    raise CircuitoAbierto(f"{host}: servicio no disponible, petición de prueba en curso")
+                h['sondeando'] = True
+
+    def exito(self, host):
+        with self._cerrojo:
+            h = self._host(host)
+            h.update(estado='cerrado', fallos=0, sondeando=False)
+
+    def fallo(self, host):
+        with self._cerrojo:
+            h = self._host(host)
+            h['fallos'] += 1
+            if h['estado'] == 'semiabierto' or h['fallos'] >= self.umbral:
+                if h['estado'] != 'abierto':
+                    h['aperturas'] += 1
+                h.update(estado='abierto', abierto_desde=time.monotonic(), sondeando=False)
+
+    def liberar(self, host):
+        """Termina la petición a ``host`` sin contarla como éxito ni como fallo."""
+        with self._cerrojo:
+            self._host(host)['sondeando'] = False
+
+    def abierto(self, host):
+        with self._cerrojo:
+            h = self._hosts.get(host)
+            return h is not None and h['estado'] != 'cerrado' and (
+                h['estado'] == 'semiabierto' or time.monotonic() - h['abierto_desde'] < self.espera)
+
+    def estado(self):
+        """``{host: {'estado', 'fallos', 'aperturas', 'reintento_en'}}`` para monitoreo."""
+        with self._cerrojo:
+            ahora = time.monotonic()
+            return {host: {'estado': h['estado'], 'fallos': h['fallos'], 'aperturas': h['aperturas'],
+                           'reintento_en': max(h['abierto_desde'] + self.espera - ahora, 0.0)
+                           if h['estado'] == 'abierto' else 0.0}
+                    for host, h in self._hosts.items()}
+
+
+interruptor = InterruptorCircuito(
+    umbral=int(os.environ.get('HTTP_UMBRAL_FALLOS', 3)),
+    espera=float(os.environ.get('HTTP_ESPERA_CIRCUITO', 30)),
+)
@@ -0,0 +1,280 @@
+"""Motor declarativo de modelos compartimentales (SIR, SEIR, SEIRS, SEIRD...).
+
+Un modelo se declara como una lista de compartimentos y flujos entre ellos.
+A partir de esa especificación se genera el código fuente del lado derecho
+(RHS) y del jacobiano analítico, y se compila una sola vez con ``exec``. Las
+funciones generadas desempaquetan el estado por filas, así que aceptan tanto
+un vector ``(n,)`` como un lote ``(n, m)`` de escenarios.
+"""
+from collections import namedtuple
+
+import numpy as np
+from scipy.integrate import odeint
+
+from utils.integradores import compilar_rhs, dopri5
+
+# 'rk45' (Dormand–Prince compilado) se elige por llamada: su primer uso en cada
+# proceso paga la compilación con Numba (~2 s), inaceptable en un callback
+METODO_POR_DEFECTO = 'odeint'
+
+# tasa: nombre del parámetro. Si se indica `infeccioso`, el flujo es de acción
+# de masas (tasa * origen * infeccioso / N); si no, es lineal (tasa * origen).
+Flujo = namedtuple('Flujo', ['origen', 'destino', 'tasa', 'infeccioso'], defaults=(None,))
+
+
+class ModeloCompartimental:
+    def __init__(self, nombre, compartimentos, flujos):
+        self.nombre = nombre
+        self.compartimentos = tuple(compartimentos)
+        self.flujos = tuple(flujos)
+
+        tasas = []
+        for flujo in self.flujos:
+            if flujo.tasa not in tasas:
+                tasas.append(flujo.tasa)
+        self.parametros = tuple(tasas) + ('N',)
+
+        # Matriz estequiométrica (n_compartimentos, n_flujos): -1 en el origen, +1 en el destino
+        self.estequiometria = np.zeros((len(self.compartimentos), len(self.flujos)), dtype=int)
+        for j, flujo in enumerate(self.flujos):
+            self.estequiometria[self.compartimentos.index(flujo.origen), j] -= 1
+            self.estequiometria[self.compartimentos.index(flujo.destino), j] += 1
+
+        self.codigo_rhs = self._codigo_rhs()
+        self.codigo_jacobiano = self._codigo_jacobiano()
+        self.rhs = self._compilar(self.codigo_rhs, 'rhs')
+        self.jacobiano = self._compilar(self.codigo_jacobiano, 'jacobiano')
+        # Tasa de cada flujo por separado (propensiones para los simuladores estocásticos)
+        self.propensiones = self._compilar(self._codigo_propensiones(), 'propensiones')
+        self.dparametros = self._compilar(self._codigo_dparametros(), 'dparametros')
+        self._rhs_compilado = None
+
+    def __repr__(self):
+        return f"ModeloCompartimental({self.nombre!r}, {self.compartimentos})"
+
+    # ---------- generación de código ----------
+    @staticmethod
+    def _termino(flujo):
+        if flujo.infeccioso:
+            return f"{flujo.tasa} * {flujo.origen} * {flujo.infeccioso} / N"
+        return f"{flujo.tasa} * {flujo.origen}"
+
+    def _encabezado(self, nombre_funcion):
+        # Acceso por índice (no desempaquetado): así el mismo código compila con Numba
+        lineas = [f"def {nombre_funcion}(y, t, {', '.join(self.parametros)}):"]
+        lineas += [f"    {c} = y[{i}]" for i, c in enumerate(self.compartimentos)]
+        return lineas
+
+    def _codigo_rhs(self):
+        lineas = self._encabezado('rhs')
+        for i, flujo in enumerate(self.flujos):
+            lineas.append(f"    f{i} = {self._termino(flujo)}")
+        derivadas = []
+        for c in self.compartimentos:
+            partes = [f"- f{i}" for i, f in enumerate(self.flujos) if f.origen == c]
+            partes += [f"+ f{i}" for i, f in enumerate(self.flujos) if f.destino == c]
+            derivadas.append(' '.join(partes).lstrip('+ ') if partes else '0.0 * y[0]')
+        lineas.append(f"    return np.array([{', '.join(derivadas)}])")
+        return '\n'.join(lineas)
+
+    def _derivada_flujo(self, flujo, respecto):
+        """Derivada parcial del término de un flujo respecto de un compartimento."""
+        if flujo.infeccioso:
+            if respecto == flujo.origen:
+                return f"{flujo.tasa} * {flujo.infeccioso} / N"
+            if respecto == flujo.infeccioso:
+                return f"{flujo.tasa} * {flujo.origen} / N"
+            return None
+        return flujo.tasa if respecto == flujo.origen else None
+
+    def _codigo_jacobiano(self):
+        lineas = self._encabezado('jacobiano')
+        filas = []
+        for c in self.compartimentos:
+            fila = []
+            for j in self.compartimentos:
+                partes = []
+                for flujo in self.flujos:
+                    d = self._derivada_flujo(flujo, j)
+                    if d is None:
+                        continue
+                    if flujo.origen == c:
+                        partes.append(f"- {d}")
+                    if flujo.destino == c:
+                        partes.append(f"+ {d}")
+                fila.append(' '.join(partes).lstrip('+ ') if partes else '0.0')
+            filas.append(f"[{', '.join(fila)}]")
+        lineas.append(f"    return np.array([{', '.join(filas)}])")
+        return '\n'.join(lineas)
+
+    def _codigo_dparametros(self):
+        """Matriz ``(n_compartimentos, n_tasas)`` con ∂f/∂tasa (N se considera fijo)."""
+        lineas = self._encabezado('dparametros')
+        tasas = self.parametros[:-1]
+        filas = []
+        for c in self.compartimentos:
+            fila = []
+            for tasa in tasas:
+                partes = []
+                for flujo in self.flujos:
+                    if flujo.tasa != tasa:
+                        continue
+                    # El término es lineal en su tasa: ∂(tasa * g)/∂tasa = g
+                    g = f"{flujo.origen} * {flujo.infeccioso} / N" if flujo.infeccioso else flujo.origen
+                    if flujo.origen == c:
+                        partes.append(f"- {g}")
+                    if flujo.destino == c:
+                        partes.append(f"+ {g}")
+                fila.append(' '.join(partes).lstrip('+ ') if partes else '0.0')
+            filas.append(f"[{', '.join(fila)}]")
+        lineas.append(f"    return np.array([{', '.join(filas)}])")
+        return '\n'.join(lineas)
+
+    def _codigo_propensiones(self):
+        lineas = self._encabezado('propensiones')
+        lineas.append(f"    return np.array([{', '.join(self._termino(f) for f in self.flujos)}])")
+        return '\n'.join(lineas)
+
+    @staticmethod
+    def _compilar(codigo, nombre):
+        espacio = {'np': np}
+        exec(compile(codigo, f'<modelo:{nombre}>', 'exec'), espacio)
+        return espacio[nombre]
+
+    # ---------- simulación ----------
+    def estado_inicial(self, N, iniciales):
+        """Vector inicial: el primer compartimento recibe ``N`` menos el resto."""
+        y0 = np.array([float(iniciales.get(c, 0.0)) for c in self.compartimentos])
+        y0[0] = N - y0[1:].sum()
+        return y0
+
+    def argumentos(self, params):
+        return tuple(params[p] for p in self.parametros)
+
+    @property
+    def rhs_compilado(self):
+        """RHS compilado con Numba (se compila en el primer uso)."""
+        if self._rhs_compilado is None:
+            self._rhs_compilado = compilar_rhs(self.rhs)
+        return self._rhs_compilado
+
+    def simular(self, params, t, iniciales, metodo=None):
+        """Integra el modelo y devuelve un arreglo ``(len(t), n_compartimentos)``.
+
+        ``params`` es un dict con las tasas y ``N``; ``iniciales`` un dict con
+        los valores iniciales de cada compartimento salvo el primero.
+        ``metodo`` es ``'odeint'`` (LSODA con el jacobiano analítico) o
+        ``'rk45'`` (Dormand–Prince adaptativo, compilado si hay Numba); por
+        defecto ``METODO_POR_DEFECTO``.
+        """
+        y0 = self.estado_inicial(params['N'], iniciales)
+        metodo = metodo or METODO_POR_DEFECTO
+        if metodo == 'rk45':
+            return dopri5(self.rhs_compilado, y0, t, self.argumentos(params))[0]
+        if metodo != 'odeint':
+            raise ValueError(f"Método de integración desconocido: {metodo}")
+        return odeint(self.rhs, y0, t, args=self.argumentos(params), Dfun=self.jacobiano)
+
+    def sensibilidades(self, params, t, iniciales, respecto):
+        """Resuelve el sistema de sensibilidades hacia adelante en una sola integración.
+
+        ``respecto`` mezcla tasas (p. ej. ``'beta'``) y condiciones iniciales
+        de compartimentos distintos del primero (p. ej. ``'E'``; al aumentarla
+        el primer compartimento disminuye en igual medida, como en
+        :meth:`estado_inicial`). Junto al estado ``y`` se integra
+        ``s' = J s + ∂f/∂θ`` para cada ``θ``. Devuelve ``(y, s)`` con formas
+        ``(len(t), n)`` y ``(len(t), n, len(respecto))``.
+        """
+        n, q = len(self.compartimentos), len(respecto)
+        tasas = self.parametros[:-1]
+        args = self.argumentos(params)
+        columnas = [tasas.index(r) if r in tasas else None for r in respecto]
+
+        s0 = np.zeros((n, q))
+        for k, r in enumerate(respecto):
+            if r in self.compartimentos[1:]:
+                s0[self.compartimentos.index(r), k] = 1.0
+                s0[0, k] = -1.0
+            elif r not in tasas:
+                raise ValueError(f"Parámetro de sensibilidad desconocido: {r}")
+        z0 = np.concatenate([self.estado_inicial(params['N'], iniciales), s0.ravel()])
+
+        def aumentado(z, t_, *args):
+            y, s = z[:n], z[n:].reshape(n, q)
+            ds = self.jacobiano(y, t_, *args) @ s
+            dp = self.dparametros(y, t_, *args)
+            for k, col in enumerate(columnas):
+                if col is not None:
+                    ds[:, k] += dp[:, col]
+            return np.concatenate([self.rhs(y, t_, *args), ds.ravel()])
+
+        sol = odeint(aumentado, z0, t, args=args)
+        return sol[:, :n], sol[:, n:].reshape(len(t), n, q)
+
+    def simular_lote(self, params, t, iniciales, paso_max=0.25, registrar=None):
+        """Integra ``m`` escenarios a la vez con RK4 de paso fijo.
+
+        Los valores de ``params`` e ``iniciales`` pueden ser escalares o
+        arreglos de forma ``(m,)``; todo el lote se apila en un único estado
+        ``(n_compartimentos, m)`` y cada paso es una sola evaluación del RHS
+        generado. ``t`` debe ser creciente; entre dos salidas se dan los
+        subpasos necesarios para no superar ``paso_max``. ``registrar`` limita
+        los compartimentos guardados (p. ej. ``('S', 'I')``) para ahorrar
+        memoria. Devuelve un arreglo ``(len(t), n_registrados, m)``.
+        """
+        args = tuple(np.asarray(a, dtype=float) for a in self.argumentos(params))
+        m = int(np.broadcast(*args, *(np.asarray(v) for v in iniciales.values())).size)
+        y = np.empty((len(self.compartimentos), m))
+        for i, c in enumerate(self.compartimentos[1:], start=1):
+            y[i] = iniciales.get(c, 0.0)
+        y[0] = args[-1] - y[1:].sum(axis=0)
+
+        indices = [self.compartimentos.index(c) for c in (registrar or self.compartimentos)]
+        salida = np.empty((len(t), len(indices), m))
+        salida[0] = y[indices]
+
+        rhs = self.rhs
+        for k in range(1, len(t)):
+            intervalo = t[k] - t[k - 1]
+            subpasos = max(1, int(np.ceil(intervalo / paso_max)))
+            h = intervalo / subpasos
+            tk = t[k - 1]
+            for _ in range(subpasos):
+                k1 = rhs(y, tk, *args)
+                k2 = rhs(y + 0.5 * h * k1, tk + 0.5 * h, *args)
+                k3 = rhs(y + 0.5 * h * k2, tk + 0.5 * h, *args)
+                k4 = rhs(y + h * k3, tk + h, *args)
+                y = y + h / 6.0 * (k1 + 2 * k2 + 2 * k3 + k4)
+                tk += h
+            salida[k] = y[indices]
+        return salida
+
+
+SIR = ModeloCompartimental('SIR', ['S', 'I', 'R'], [
+    Flujo('S', 'I', 'beta', infeccioso='I'),
+    Flujo('I', 'R', 'gamma'),
+])
+
+SEIR = ModeloCompartimental('SEIR', ['S', 'E', 'I', 'R'], [
+    Flujo('S', 'E', 'beta', infeccioso='I'),
+    Flujo('E', 'I', 'sigma'),
+    Flujo('I', 'R', 'gamma'),
+])
+
+SEIRS = ModeloCompartimental('SEIRS', ['S', 'E', 'I', 'R'], [
+    Flujo('S', 'E', 'beta', infeccioso='I'),
+    Flujo('E', 'I', 'sigma'),
+    Flujo('I', 'R', 'gamma'),
+    Flujo('R', 'S', 'omega'),
+])
+
+SEIRD = ModeloCompartimental('SEIRD', ['S', 'E', 'I', 'R', 'D'], [
+    Flujo('S', 'E', 'beta', infeccioso='I'),
+    Flujo('E', 'I', 'sigma'),
+    Flujo('I', 'R', 'gamma'),
+    Flujo('I', 'D', 'mu'),
+])
+
+# Registro por nombre: las funciones generadas no se pueden serializar con
+# pickle, así que los procesos trabajadores reciben el nombre del modelo
+MODELOS = {modelo.nombre: modelo for modelo in (SIR, SEIR, SEIRS, SEIRD)}
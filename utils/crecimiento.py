@@ -0,0 +1,30 @@
+"""Evaluación por lotes de modelos de crecimiento poblacional.
+
+Todos los parámetros se difunden (broadcasting) contra ``x``: pasar ``r`` con
+forma ``(frames, 1)`` y ``x`` con forma ``(400,)`` produce una matriz
+``(frames, 400)`` en una sola evaluación de NumPy.
+"""
+import numpy as np
+
+MODELOS_CRECIMIENTO = {
+    'logistico': 'Logístico',
+    'gompertz': 'Gompertz',
+    'richards': 'Richards',
+}
+
+
+def curvas_crecimiento(modelo, p0, r, k, x, nu=0.5):
+    """P(x) para ``modelo`` en ``{'logistico', 'gompertz', 'richards'}``.
+
+    ``nu`` es el parámetro de forma de Richards (``nu = 1`` equivale al logístico).
+    """
+    p0 = np.maximum(p0, 1e-6)
+    k = np.maximum(k, 1e-6)
+    with np.errstate(over='ignore'):
+        if modelo == 'logistico':
+            return k / (1 + ((k - p0) / p0) * np.exp(-r * x))
+        if modelo == 'gompertz':
+            return k * np.exp(np.log(p0 / k) * np.exp(-r * x))
+        if modelo == 'richards':
+            return k / (1 + ((k / p0) ** nu - 1) * np.exp(-r * nu * x)) ** (1 / nu)
+    raise ValueError(f"Modelo de crecimiento desconocido: {modelo}")
@@ -0,0 +1,45 @@
+"""Importación diferida de los módulos pesados de las páginas.
+
+Dash importa todas las páginas al arrancar para conocer su ruta, su layout y
+las firmas de sus callbacks; eso es lo único que necesita del módulo. Los
+modelos (``scipy.integrate``, ``scipy.optimize``, ``scipy.sparse``, numba) solo
+se usan dentro de los callbacks, así que las páginas los piden con
+``importar_diferido`` y se importan la primera vez que se accede a uno de sus
+atributos, es decir, en el primer callback que los usa.
+
+``CARGA_DIFERIDA=0`` vuelve a importarlos al arrancar (útil para depurar o
+comparar tiempos de arranque).
+"""
+import importlib
+import os
+import sys
+
+
+def carga_diferida_activada():
+    return os.environ.get('CARGA_DIFERIDA', '1') != '0'
+
+
+class ModuloDiferido:
+    """Sustituto de un módulo que lo importa en el primer acceso a un atributo."""
+
+    def __init__(self, nombre):
+        self._nombre = nombre
+
+    @property
+    def cargado(self):
+        return self._nombre in sys.modules
+
+    def __getattr__(self, atributo):
+        # import_module ya serializa importaciones simultáneas del mismo módulo
+        return getattr(importlib.import_module(self._nombre), atributo)
+
+    def __repr__(self):
+        estado = 'cargado' if self.cargado else 'sin cargar'
+        return f'<módulo diferido {self._nombre!r} ({estado})>'
+
+
+def importar_diferido(nombre):
+    """``ModuloDiferido`` para ``nombre``, o el módulo mismo si ya está importado o la carga diferida está desactivada."""
+    if nombre in sys.modules or not carga_diferida_activada():
+        return importlib.import_module(nombre)
+    return ModuloDiferido(nombre)
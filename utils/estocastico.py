@@ -0,0 +1,186 @@
+"""Simulación estocástica de modelos compartimentales (Gillespie y tau-leaping).
+
+Ambos métodos avanzan un bloque de réplicas a la vez (estado ``(n, m)``) y los
+bloques se reparten entre procesos. Cada bloque recibe su propia semilla
+derivada de ``np.random.SeedSequence(semilla)``; como el reparto en bloques no
+depende del número de procesos, el resultado es reproducible con cualquier
+cantidad de núcleos.
+
+Los procesos salen de un único pool por proceso, creado en el primer uso y
+limitado a ``MAX_PROCESOS`` (variable ``ESTOCASTICO_PROCESOS``): varios
+callbacks simultáneos comparten los mismos trabajadores en lugar de arrancar
+un pool cada uno. Los trabajadores se crean con ``forkserver`` (``spawn`` si
+no está disponible), no con ``fork``: el servidor tiene hilos, conexiones
+SQLite y un pool HTTP que no deben copiarse.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from utils.compartimentos import MODELOS
+
+TAMANO_BLOQUE = 256
+# Por debajo de este número de réplicas no compensa usar procesos
+MIN_REPLICAS_PARALELO = 2 * TAMANO_BLOQUE
+MAX_PROCESOS = int(os.environ.get('ESTOCASTICO_PROCESOS', os.cpu_count() or 1))
+
+_pool = None
+_cerrojo_pool = threading.Lock()
+
+
+def _obtener_pool():
+    global _pool
+    with _cerrojo_pool:
+        if _pool is None:
+            metodos = multiprocessing.get_all_start_methods()
+            contexto = multiprocessing.get_context('forkserver' if 'forkserver' in metodos else 'spawn')
+            if contexto.get_start_method() == 'forkserver':
+                # El servidor de procesos carga el simulador una vez; cada trabajador lo hereda
+                contexto.set_forkserver_preload([__name__])
+            _pool = ProcessPoolExecutor(max_workers=MAX_PROCESOS, mp_context=contexto)
+        return _pool
+
+
+def _descartar_pool(pool):
+    global _pool
+    with _cerrojo_pool:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _en_pool(tareas, procesos):
+    """Resultados de ``_simular_bloque`` en orden, con a lo sumo ``procesos`` bloques en curso."""
+    pool = _obtener_pool()
+    resultados = [None] * len(tareas)
+    en_curso = {}
+    try:
+        for i, tarea in enumerate(tareas):
+            en_curso[pool.submit(_simular_bloque, *tarea)] = i
+            if len(en_curso) >= procesos:
+                listos, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+                for futuro in listos:
+                    resultados[en_curso.pop(futuro)] = futuro.result()
+        for futuro, i in en_curso.items():
+            resultados[i] = futuro.result()
+    except BrokenProcessPool:
+        # Un trabajador murió (p. ej. sin memoria): el siguiente uso crea otro pool
+        _descartar_pool(pool)
+        raise
+    return resultados
+
+
+def _estado_inicial(modelo, params, iniciales, m):
+    y0 = np.rint(modelo.estado_inicial(params['N'], iniciales)).astype(np.int64)
+    return np.repeat(y0[:, None], m, axis=1)
+
+
+def _tau_leaping(modelo, params, t, iniciales, m, rng, paso_max):
+    """Tau-leaping de paso fijo con recorte para no dejar compartimentos negativos."""
+    args = modelo.argumentos(params)
+    y = _estado_inicial(modelo, params, iniciales, m)
+    salida = np.empty((len(t), len(modelo.compartimentos), m), dtype=np.int64)
+    salida[0] = y
+    origenes = [modelo.compartimentos.index(f.origen) for f in modelo.flujos]
+    destinos = [modelo.compartimentos.index(f.destino) for f in modelo.flujos]
+
+    for k in range(1, len(t)):
+        intervalo = t[k] - t[k - 1]
+        subpasos = max(1, int(np.ceil(intervalo / paso_max)))
+        tau = intervalo / subpasos
+        for _ in range(subpasos):
+            a = modelo.propensiones(y.astype(float), t[k - 1], *args)
+            eventos = rng.poisson(np.maximum(a, 0.0) * tau)
+            # Flujo por flujo: un compartimento no puede perder más individuos de los que tiene
+            for j, (o, d) in enumerate(zip(origenes, destinos)):
+                n = np.minimum(eventos[j], y[o])
+                y[o] -= n
+                y[d] += n
+        salida[k] = y
+    return salida
+
+
+def _gillespie(modelo, params, t, iniciales, m, rng):
+    """Algoritmo directo de Gillespie, con un reloj propio por réplica."""
+    args = modelo.argumentos(params)
+    estequiometria = modelo.estequiometria
+    y = _estado_inicial(modelo, params, iniciales, m)
+    salida = np.empty((len(t), len(modelo.compartimentos), m), dtype=np.int64)
+    reloj = np.full(m, float(t[0]))
+    siguiente = np.ones(m, dtype=np.int64)  # próximo índice de t por registrar
+    salida[0] = y
+
+    while True:
+        activas = np.flatnonzero(siguiente < len(t))
+        if activas.size == 0:
+            break
+        ya = y[:, activas]
+        a = np.maximum(modelo.propensiones(ya.astype(float), 0.0, *args), 0.0)
+        a0 = a.sum(axis=0)
+        with np.errstate(divide='ignore'):
+            dt = np.where(a0 > 0, rng.exponential(1.0, activas.size) / a0, np.inf)
+        nuevo_reloj = reloj[activas] + dt
+
+        # Antes de aplicar el evento, registrar el estado en cada instante que se cruza
+        sig = siguiente[activas]
+        while True:
+            idx = np.flatnonzero((sig < len(t)) & (t[np.minimum(sig, len(t) - 1)] <= nuevo_reloj))
+            if idx.size == 0:
+                break
+            salida[sig[idx], :, activas[idx]] = y[:, activas[idx]].T
+            sig[idx] += 1
+        siguiente[activas] = sig
+
+        # Elegir qué flujo ocurre en cada réplica con una sola muestra uniforme
+        acumulada = np.cumsum(a, axis=0)
+        u = rng.random(activas.size) * a0
+        flujo = np.minimum((acumulada < u).sum(axis=0), a.shape[0] - 1)
+        con_evento = np.isfinite(dt)
+        y[:, activas[con_evento]] += estequiometria[:, flujo[con_evento]]
+        reloj[activas] = nuevo_reloj
+    return salida
+
+
+def _simular_bloque(nombre_modelo, metodo, params, t, iniciales, m, semilla, paso_max):
+    modelo = MODELOS[nombre_modelo]
+    rng = np.random.default_rng(semilla)
+    if metodo == 'gillespie':
+        return _gillespie(modelo, params, t, iniciales, m, rng)
+    return _tau_leaping(modelo, params, t, iniciales, m, rng, paso_max)
+
+
+def simular_replicas(modelo, params, t, iniciales, replicas=100, metodo='tau', semilla=0,
+                     procesos=None, paso_max=0.25):
+    """Simula ``replicas`` trayectorias estocásticas de ``modelo``.
+
+    ``metodo`` es ``'gillespie'`` (exacto) o ``'tau'`` (tau-leaping). Con
+    ``procesos=None`` se usan hasta ``MAX_PROCESOS`` trabajadores del pool
+    compartido cuando hay suficientes réplicas; ``procesos=1`` fuerza la
+    ejecución en el proceso actual.
+    Devuelve un arreglo entero ``(len(t), n_compartimentos, replicas)``.
+    """
+    t = np.asarray(t, dtype=float)
+    tamanos = [TAMANO_BLOQUE] * (replicas // TAMANO_BLOQUE)
+    if replicas % TAMANO_BLOQUE:
+        tamanos.append(replicas % TAMANO_BLOQUE)
+    semillas = np.random.SeedSequence(semilla).spawn(len(tamanos))
+    tareas = [(modelo.nombre, metodo, params, t, iniciales, m, s, paso_max)
+              for m, s in zip(tamanos, semillas)]
+
+    if procesos is None:
+        procesos = MAX_PROCESOS if replicas >= MIN_REPLICAS_PARALELO else 1
+    procesos = max(1, min(procesos, MAX_PROCESOS, len(tareas)))
+    if procesos == 1:
+        bloques = [_simular_bloque(*tarea) for tarea in tareas]
+    else:
+        bloques = _en_pool(tareas, procesos)
+    return np.concatenate(bloques, axis=2)
+
+
+def bandas(resultado, percentiles=(5, 50, 95)):
+    """Percentiles por instante y compartimento: ``(len(percentiles), len(t), n)``."""
+    return np.percentile(resultado, percentiles, axis=2)
@@ -0,0 +1,108 @@
+"""Motor seguro de expresiones para las ecuaciones dx/dt y dy/dt.
+
+El texto se analiza una sola vez, se valida contra una lista blanca de nodos
+AST y se compila a una función vectorizada ``f(x, y)`` de NumPy. Las funciones
+compiladas quedan en una caché LRU acotada, de modo que cambiar solo el mallado
+o el rango no vuelve a analizar la expresión.
+"""
+import ast
+from functools import lru_cache
+
+import numpy as np
+
+TAMANO_CACHE = 128
+
+FUNCIONES = {
+    'sin': np.sin, 'cos': np.cos, 'tan': np.tan,
+    'arcsin': np.arcsin, 'arccos': np.arccos, 'arctan': np.arctan, 'arctan2': np.arctan2,
+    'sinh': np.sinh, 'cosh': np.cosh, 'tanh': np.tanh,
+    'exp': np.exp, 'log': np.log, 'log10': np.log10, 'sqrt': np.sqrt,
+    'abs': np.abs, 'sign': np.sign, 'hypot': np.hypot,
+    'minimum': np.minimum, 'maximum': np.maximum,
+}
+CONSTANTES = {'pi': np.pi, 'e': np.e}
+# Alias aceptados para las variables de la malla
+VARIABLES = {'x': 'x', 'y': 'y', 'X': 'x', 'Y': 'y'}
+
+_OPERADORES = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod, ast.FloorDiv,
+               ast.USub, ast.UAdd)
+
+
+class ExpresionInvalida(ValueError):
+    """La expresión contiene sintaxis o nombres fuera de la lista blanca."""
+
+
+class _Validador(ast.NodeTransformer):
+    """Valida el árbol y lo reescribe a nombres planos (``np.sin`` -> ``sin``, ``X`` -> ``x``)."""
+
+    def generic_visit(self, node):
+        permitidos = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Call, ast.Load) + _OPERADORES
+        if not isinstance(node, permitidos):
+            raise ExpresionInvalida(f"Sintaxis no permitida: {type(node).__name__}")
+        return super().generic_visit(node)
+
+    def visit_Constant(self, node):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise ExpresionInvalida(f"Constante no permitida: {node.value!r}")
+        # Enteros a float: evita potencias gigantes con enteros de precisión arbitraria
+        return ast.copy_location(ast.Constant(value=float(node.value)), node)
+
+    def visit_Name(self, node):
+        if node.id in VARIABLES:
+            return ast.copy_location(ast.Name(id=VARIABLES[node.id], ctx=ast.Load()), node)
+        if node.id in CONSTANTES or node.id in FUNCIONES:
+            return node
+        raise ExpresionInvalida(f"Nombre no permitido: {node.id}")
+
+    def visit_Attribute(self, node):
+        # Solo se admite np.<funcion> o np.<constante> de la lista blanca
+        if (isinstance(node.value, ast.Name) and node.value.id == 'np'
+                and (node.attr in FUNCIONES or node.attr in CONSTANTES)):
+            return ast.copy_location(ast.Name(id=node.attr, ctx=ast.Load()), node)
+        raise ExpresionInvalida(f"Atributo no permitido: {ast.unparse(node)}")
+
+    def visit_Call(self, node):
+        if node.keywords:
+            raise ExpresionInvalida("No se permiten argumentos con nombre")
+        node = self.generic_visit(node)
+        if not (isinstance(node.func, ast.Name) and node.func.id in FUNCIONES):
+            raise ExpresionInvalida(f"Función no permitida: {ast.unparse(node.func)}")
+        return node
+
+
+def normalizar(texto):
+    """Clave de caché: el texto sin espacios en blanco."""
+    if not isinstance(texto, str) or not texto.strip():
+        raise ExpresionInvalida("La expresión está vacía")
+    return ''.join(texto.split())
+
+
+@lru_cache(maxsize=TAMANO_CACHE)
+def _compilar_normalizada(clave):
+    try:
+        arbol = ast.parse(clave, mode='eval')
+    except SyntaxError as error:
+        raise ExpresionInvalida(f"Sintaxis inválida: {error.msg}") from None
+    cuerpo = _Validador().visit(arbol).body
+
+    args = ast.arguments(posonlyargs=[], args=[ast.arg('x'), ast.arg('y')], kwonlyargs=[],
+                         kw_defaults=[], defaults=[])
+    lambda_ = ast.fix_missing_locations(ast.Expression(ast.Lambda(args=args, body=cuerpo)))
+    entorno = {'__builtins__': {}, **FUNCIONES, **CONSTANTES}
+    return eval(compile(lambda_, '<expresion>', 'eval'), entorno)
+
+
+def compilar(texto):
+    """Devuelve ``f(x, y)`` vectorizada; el resultado siempre tiene la forma de ``x``."""
+    funcion = _compilar_normalizada(normalizar(texto))
+
+    def evaluar(x, y):
+        with np.errstate(all='ignore'):
+            valor = funcion(x, y)
+        return np.broadcast_to(np.asarray(valor, dtype=float), np.shape(x))
+
+    return evaluar
+
+
+def info_cache():
+    return _compilar_normalizada.cache_info()
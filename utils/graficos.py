@@ -0,0 +1,21 @@
+"""Trazas de Plotly reutilizadas por varias páginas."""
+import plotly.graph_objects as go
+
+# Componentes RGB de los colores usados en las páginas, para rellenos semitransparentes
+_RGB = {
+    'blue': '0, 0, 255',
+    'orange': '255, 165, 0',
+    'red': '255, 0, 0',
+    'green': '0, 128, 0',
+    'black': '0, 0, 0',
+}
+
+
+def trazas_banda(x, inferior, superior, color):
+    """Banda [inferior, superior] como área rellena, sin leyenda ni hover."""
+    relleno = f"rgba({_RGB.get(color, '128, 128, 128')}, 0.2)"
+    return [
+        go.Scatter(x=x, y=superior, mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'),
+        go.Scatter(x=x, y=inferior, mode='lines', line=dict(width=0), fill='tonexty', fillcolor=relleno,
+                   showlegend=False, hoverinfo='skip'),
+    ]
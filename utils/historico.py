@@ -0,0 +1,217 @@
+"""Almacén columnar de series históricas de COVID por país.
+
+El histórico completo de cada país se descarga una vez y se guarda como
+arreglos NumPy (fechas ``datetime64[D]`` y una columna por serie). Al
+refrescar solo se piden los días posteriores al último guardado y se añaden
+al final; cualquier rango (30, 60, ..., todo) se sirve como una vista de los
+mismos arreglos, sin copiar ni volver a pedirlo a la API.
+
+Para comparar países, ``series`` pide todos los que falten en una sola
+petición masiva y ``apilar`` los alinea en una matriz ``(países, días)``
+sobre la que se calculan casos diarios y medias móviles sin bucles.
+"""
+import threading
+import time
+
+import numpy as np
+
+COLUMNAS = ('cases', 'deaths', 'recovered')
+# Días pedidos al refrescar: el hueco desde la última fecha guardada, con al
+# menos uno de solape y a lo sumo SOLAPE_MAX (la API puede llevar meses sin datos nuevos)
+SOLAPE_MAX = 30
+
+
+def parsear_fechas(claves):
+    """Convierte claves ``m/d/yy`` (disease.sh) o ISO en ``datetime64[D]`` de una vez.
+
+    Las claves ``m/d/yy`` se unen en un solo texto y se leen todos los enteros
+    con un único ``np.fromstring``; mes, día y año se combinan con aritmética
+    de ``datetime64`` en lugar de llamar a ``strptime`` por fecha.
+    """
+    claves = list(claves)
+    con_barra = np.fromiter(('/' in c for c in claves), dtype=bool, count=len(claves))
+    fechas = np.empty(len(claves), dtype='datetime64[D]')
+    if con_barra.any():
+        texto = '/'.join(c for c, b in zip(claves, con_barra) if b)
+        mes, dia, anio = np.fromstring(texto, dtype=np.int64, sep='/').reshape(-1, 3).T
+        anio = np.where(anio < 100, anio + 2000, anio)
+        meses = (anio - 1970) * 12 + (mes - 1)
+        fechas[con_barra] = (meses.astype('datetime64[M]').astype('datetime64[D]')
+                             + (dia - 1).astype('timedelta64[D]'))
+    if not con_barra.all():
+        fechas[~con_barra] = [c[:10] for c, b in zip(claves, con_barra) if not b]
+    return fechas
+
+
+class SerieHistorica:
+    """Columnas de un país: ``fechas`` ordenadas y un arreglo por cada serie."""
+
+    def __init__(self, fechas, columnas):
+        self.fechas = fechas
+        self.columnas = columnas
+        self.actualizado = time.time()
+
+    @classmethod
+    def desde_timeline(cls, timeline):
+        serie_base = timeline.get('cases', {})
+        fechas = parsear_fechas(serie_base.keys())
+        orden = np.argsort(fechas, kind='stable')
+        columnas = {}
+        for nombre in COLUMNAS:
+            valores = np.fromiter(timeline.get(nombre, {}).values(), dtype=float)
+            if valores.size != fechas.size:
+                valores = np.full(fechas.size, np.nan)
+            columnas[nombre] = valores[orden]
+        return cls(fechas[orden], columnas)
+
+    def anexar(self, nueva):
+        """Añade solo los días posteriores al último guardado."""
+        if self.fechas.size:
+            nuevos = nueva.fechas > self.fechas[-1]
+        else:
+            nuevos = np.ones(nueva.fechas.size, dtype=bool)
+        if nuevos.any():
+            # Columnas antes que fechas: un lector que vea las fechas nuevas ya ve
+            # columnas igual de largas (ver ``ultimos``)
+            self.columnas = {c: np.concatenate([v, nueva.columnas[c][nuevos]])
+                             for c, v in self.columnas.items()}
+            self.fechas = np.concatenate([self.fechas, nueva.fechas[nuevos]])
+        self.actualizado = time.time()
+        return int(nuevos.sum())
+
+    def ultimos(self, dias):
+        """Vista de los últimos ``dias`` (``'all'`` o ``None``: todo)."""
+        fechas = self.fechas
+        fin = fechas.size
+        inicio = 0 if dias in (None, 'all') else max(fin - int(dias), 0)
+        return fechas[inicio:], {c: v[inicio:fin] for c, v in self.columnas.items()}
+
+
+class AlmacenHistorico:
+    """Series por país. ``descargar(pais, dias)`` devuelve el JSON de ``/historical``.
+
+    Una serie con más de ``refresco`` segundos se completa pidiendo solo los
+    días que faltan más uno de solape, como mucho ``SOLAPE_MAX``; si lo
+    recibido no empalma con lo guardado (faltaban más días) se pide el
+    histórico completo. ``descargar_varios(paises, dias)``,
+    opcional, devuelve la lista de ``/historical/{p1,p2,...}`` y se usa en
+    :meth:`series` para pedir varios países a la vez.
+    """
+
+    def __init__(self, descargar, refresco=6 * 60 * 60, descargar_varios=None):
+        self.descargar = descargar
+        self.descargar_varios = descargar_varios
+        self.refresco = refresco
+        self._series = {}
+        self._cerrojos = {}
+        self._cerrojo = threading.Lock()
+
+    def _cerrojo_pais(self, pais):
+        with self._cerrojo:
+            return self._cerrojos.setdefault(pais, threading.Lock())
+
+    def serie(self, pais):
+        """``SerieHistorica`` del país, descargando o completando si hace falta.
+
+        Devuelve ``None`` si no hay datos y la descarga falla; si ya había una
+        serie y el refresco falla, se devuelve la que había.
+        """
+        with self._cerrojo_pais(pais):
+            actual = self._series.get(pais)
+            if not self._vencida(actual):
+                return actual
+            datos = self.descargar(pais, self._dias_faltantes(actual))
+            if not datos or 'timeline' not in datos:
+                return actual
+            nueva = SerieHistorica.desde_timeline(datos['timeline'])
+            if not self._empalma(actual, nueva):
+                datos = self.descargar(pais, 'all')
+                if not datos or 'timeline' not in datos:
+                    return actual
+                nueva = SerieHistorica.desde_timeline(datos['timeline'])
+            return self._integrar(pais, nueva)
+
+    def series(self, paises):
+        """``{pais: SerieHistorica}``; los vencidos se piden en una sola petición."""
+        pendientes = [p for p in paises if self._vencida(self._series.get(p))]
+        if len(pendientes) > 1 and self.descargar_varios is not None:
+            faltan = [self._dias_faltantes(self._series.get(p)) for p in pendientes]
+            dias = 'all' if 'all' in faltan else max(faltan)
+            datos = self.descargar_varios(pendientes, dias) or []
+            if isinstance(datos, dict):
+                datos = [datos]
+            por_nombre = {str(d.get('country', '')).lower(): d for d in datos if isinstance(d, dict)}
+            for i, pais in enumerate(pendientes):
+                # disease.sh devuelve los países en el orden pedido, con su nombre canónico
+                item = datos[i] if len(datos) == len(pendientes) else por_nombre.get(pais.lower())
+                if item and 'timeline' in item:
+                    nueva = SerieHistorica.desde_timeline(item['timeline'])
+                    with self._cerrojo_pais(pais):
+                        # Si no empalma, ``serie`` lo completa abajo por separado
+                        if self._empalma(self._series.get(pais), nueva):
+                            self._integrar(pais, nueva)
+        return {p: s for p in paises if (s := self.serie(p)) is not None}
+
+    def _vencida(self, serie):
+        return serie is None or time.time() - serie.actualizado >= self.refresco
+
+    @staticmethod
+    def _dias_faltantes(serie):
+        if serie is None or not serie.fechas.size:
+            return 'all'
+        hoy = np.datetime64('today', 'D')
+        return min(max(int((hoy - serie.fechas[-1]) / np.timedelta64(1, 'D')) + 1, 2), SOLAPE_MAX)
+
+    @staticmethod
+    def _empalma(actual, nueva):
+        """``nueva`` no deja huecos tras el último día de ``actual``."""
+        if actual is None or not actual.fechas.size or not nueva.fechas.size:
+            return True
+        return nueva.fechas[0] <= actual.fechas[-1] + np.timedelta64(1, 'D')
+
+    def _integrar(self, pais, nueva):
+        actual = self._series.get(pais)
+        if actual is None:
+            self._series[pais] = actual = nueva
+        else:
+            actual.anexar(nueva)
+        return actual
+
+    def ultimos(self, pais, dias):
+        """``(fechas, columnas)`` de los últimos ``dias`` como vistas, o ``None``."""
+        serie = self.serie(pais)
+        return None if serie is None else serie.ultimos(dias)
+
+
+def apilar(series, dias=None, columna='cases'):
+    """Alinea ``columna`` de varias series en las fechas comunes.
+
+    Devuelve ``(fechas, matriz)`` con ``matriz`` de forma ``(len(series), len(fechas))``
+    en el orden de ``series`` (dict o lista de ``SerieHistorica``).
+    """
+    series = list(series.values()) if isinstance(series, dict) else list(series)
+    if not series:
+        return np.array([], dtype='datetime64[D]'), np.empty((0, 0))
+    comunes = series[0].fechas
+    for serie in series[1:]:
+        comunes = np.intersect1d(comunes, serie.fechas, assume_unique=True)
+    if dias not in (None, 'all'):
+        comunes = comunes[-int(dias):]
+    matriz = np.stack([s.columnas[columna][np.searchsorted(s.fechas, comunes)] for s in series])
+    return comunes, matriz
+
+
+def nuevos_diarios(acumulados):
+    """Diferencias diarias por fila; las correcciones negativas se llevan a 0."""
+    diarios = np.diff(acumulados, axis=-1, prepend=acumulados[..., :1])
+    return np.maximum(diarios, 0.0)
+
+
+def media_movil(valores, ventana=7):
+    """Media móvil por fila con sumas acumuladas; los primeros ``ventana - 1`` días son NaN."""
+    suma = np.cumsum(np.nan_to_num(valores), axis=-1)
+    media = np.full(valores.shape, np.nan)
+    if valores.shape[-1] >= ventana:
+        suma = np.concatenate([np.zeros(valores.shape[:-1] + (1,)), suma], axis=-1)
+        media[..., ventana - 1:] = (suma[..., ventana:] - suma[..., :-ventana]) / ventana
+    return media
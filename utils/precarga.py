@@ -0,0 +1,95 @@
+"""Precarga periódica en segundo plano de los datos que muestran las páginas.
+
+Cada página registra sus tareas (``precargador.registrar(nombre, funcion, *args)``)
+y ``app.py`` arranca el hilo al iniciar. Cada ronda ejecuta todas las tareas
+con a lo sumo ``concurrencia`` a la vez y la siguiente empieza tras
+``intervalo`` segundos más un desfase aleatorio de ±``jitter`` (fracción), para
+que varios procesos no consulten las APIs al mismo tiempo. Las tareas pasan
+por la caché HTTP compartida, así que los callbacks encuentran datos frescos.
+
+Variables de entorno: ``PRECARGA=0`` la desactiva; ``PRECARGA_INTERVALO``
+(segundos), ``PRECARGA_CONCURRENCIA`` y ``PRECARGA_JITTER``.
+"""
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Precargador:
+    def __init__(self, intervalo=300.0, concurrencia=3, jitter=0.1, semilla=None):
+        self.intervalo = intervalo
+        self.concurrencia = concurrencia
+        self.jitter = jitter
+        self._tareas = {}
+        self._estado = {}
+        self._azar = random.Random(semilla)
+        self._detener = threading.Event()
+        self._hilo = None
+        self._cerrojo = threading.Lock()
+
+    def registrar(self, nombre, funcion, *args):
+        """Añade (o reemplaza) una tarea; ``funcion(*args)`` debe devolver algo no vacío si tuvo éxito."""
+        with self._cerrojo:
+            self._tareas[nombre] = (funcion, args)
+
+    def _ejecutar(self, nombre, funcion, args):
+        inicio = time.time()
+        try:
+            ok = bool(funcion(*args))
+            error = None if ok else 'sin datos'
+        except Exception as e:  # una tarea rota no debe detener las demás
+            ok, error = False, str(e)
+        anterior = self._estado.get(nombre, {})
+        self._estado[nombre] = {
+            'ultimo_intento': inicio,
+            'ultimo_exito': inicio if ok else anterior.get('ultimo_exito'),
+            'duracion': time.time() - inicio,
+            'error': error,
+        }
+        return ok
+
+    def ronda(self):
+        """Ejecuta todas las tareas una vez; devuelve cuántas tuvieron éxito."""
+        with self._cerrojo:
+            tareas = list(self._tareas.items())
+        with ThreadPoolExecutor(max_workers=self.concurrencia, thread_name_prefix='precarga') as ejecutor:
+            resultados = list(ejecutor.map(lambda t: self._ejecutar(t[0], *t[1]), tareas))
+        return sum(resultados)
+
+    def espera(self):
+        """Segundos hasta la próxima ronda, con desfase aleatorio."""
+        return max(self.intervalo * (1 + self._azar.uniform(-self.jitter, self.jitter)), 1.0)
+
+    def _bucle(self):
+        while not self._detener.is_set():
+            self.ronda()
+            self._detener.wait(self.espera())
+
+    def iniciar(self):
+        """Arranca el hilo (una sola vez por proceso); la primera ronda es inmediata."""
+        with self._cerrojo:
+            if self._hilo is not None and self._hilo.is_alive():
+                return
+            self._detener.clear()
+            self._hilo = threading.Thread(target=self._bucle, name='precarga', daemon=True)
+            self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+
+    def estado(self):
+        """``{nombre: {'ultimo_intento', 'ultimo_exito', 'duracion', 'error'}}``."""
+        return dict(self._estado)
+
+
+precargador = Precargador(
+    intervalo=float(os.environ.get('PRECARGA_INTERVALO', 300)),
+    concurrencia=int(os.environ.get('PRECARGA_CONCURRENCIA', 3)),
+    jitter=float(os.environ.get('PRECARGA_JITTER', 0.1)),
+)
+
+
+def precarga_activada():
+    return os.environ.get('PRECARGA', '1') != '0'
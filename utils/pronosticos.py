@@ -0,0 +1,108 @@
+"""Caché de pronósticos alineada con las corridas de los modelos meteorológicos.
+
+Un pronóstico de Open-Meteo solo cambia cuando corre el modelo (cada 6 h para
+los modelos globales, disponibles unas horas después). En lugar de un TTL
+fijo, cada copia vale hasta la siguiente hora de publicación. Por ciudad se
+guarda solo el pronóstico más largo (``horizonte_max`` días): los horizontes
+menores se obtienen recortando sus series horarias, sin otra petición.
+"""
+import threading
+import time
+
+# Horas UTC de las corridas y demora hasta que Open-Meteo publica sus datos
+CORRIDAS_UTC = (0, 6, 12, 18)
+DEMORA_PUBLICACION = 2 * 3600
+
+
+def _publicaciones(ahora):
+    dia = ahora - ahora % 86400
+    return sorted(dia + d * 86400 + h * 3600 + DEMORA_PUBLICACION
+                  for d in (-1, 0, 1) for h in CORRIDAS_UTC)
+
+
+def ultima_actualizacion(ahora=None):
+    """Instante (epoch) de la última publicación de modelo anterior a ``ahora``."""
+    ahora = time.time() if ahora is None else ahora
+    return max(t for t in _publicaciones(ahora) if t <= ahora)
+
+
+def proxima_actualizacion(ahora=None):
+    """Instante (epoch) de la siguiente publicación de modelo."""
+    ahora = time.time() if ahora is None else ahora
+    return min(t for t in _publicaciones(ahora) if t > ahora)
+
+
+def recortar(datos, dias):
+    """Copia superficial de la respuesta con las series horarias de los primeros ``dias``."""
+    horas = int(dias) * 24
+    recorte = dict(datos)
+    recorte['hourly'] = {k: v[:horas] for k, v in datos.get('hourly', {}).items()}
+    return recorte
+
+
+class CachePronosticos:
+    """Pronósticos por ``(ciudad, horizonte)`` servidos desde una descarga por ciudad.
+
+    ``descargar(ciudad)`` devuelve la respuesta de ``horizonte_max`` días (o
+    ``None``). La copia de cada ciudad vence en la siguiente publicación de
+    modelo posterior a su descarga. ``edad(ciudad)``, si se da, devuelve los
+    segundos que lleva guardada la copia que sirve ``descargar`` (p. ej. una
+    copia vieja de la caché HTTP servida mientras se revalida): así una copia
+    anterior a la última publicación no se memoriza y la siguiente consulta
+    vuelve a pedirla. ``aciertos``/``fallos`` cuentan las consultas servidas
+    sin y con llamada a ``descargar``.
+    """
+
+    def __init__(self, descargar, horizonte_max=14, edad=None):
+        self.descargar = descargar
+        self.horizonte_max = horizonte_max
+        self._edad = edad
+        self._ciudades = {}
+        self._recortes = {}
+        self._cerrojo = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, ciudad, dias):
+        dias = min(int(dias), self.horizonte_max)
+        ahora = time.time()
+        with self._cerrojo:
+            entrada = self._ciudades.get(ciudad)
+            if entrada is not None and ahora < entrada['vence']:
+                self.aciertos += 1
+                clave = (ciudad, dias)
+                if clave not in self._recortes:
+                    self._recortes[clave] = recortar(entrada['datos'], dias)
+                return self._recortes[clave]
+            self.fallos += 1
+
+        # Edad leída antes de descargar: si una revalidación guarda una copia
+        # nueva mientras tanto, se subestima la vigencia, nunca se alarga
+        edad = self._edad(ciudad) if self._edad else None
+        datos = self.descargar(ciudad)
+        if not datos:
+            # Sin red: mejor la copia vencida que nada
+            return recortar(entrada['datos'], dias) if entrada is not None else None
+        if edad is None and self._edad:
+            edad = self._edad(ciudad)
+        guardado = ahora - (edad or 0.0)
+        with self._cerrojo:
+            self._ciudades[ciudad] = {'datos': datos, 'guardado': guardado,
+                                      'vence': proxima_actualizacion(guardado)}
+            for clave in [c for c in self._recortes if c[0] == ciudad]:
+                del self._recortes[clave]
+            recorte = self._recortes[(ciudad, dias)] = recortar(datos, dias)
+        return recorte
+
+    def vence(self, ciudad):
+        entrada = self._ciudades.get(ciudad)
+        return None if entrada is None else entrada['vence']
+
+    def edad(self, ciudad):
+        """Segundos desde que se guardó la copia que este proceso está sirviendo, o ``None``."""
+        entrada = self._ciudades.get(ciudad)
+        return None if entrada is None else time.time() - entrada['guardado']
+
+    def tasa_aciertos(self):
+        total = self.aciertos + self.fallos
+        return self.aciertos / total if total else 0.0